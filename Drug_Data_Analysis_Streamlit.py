@@ -31,545 +31,603 @@ st.markdown("- **Visualizations**: Using advanced visualizations to uncover patt
 
 st.markdown("---")
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.animation as animation
-import numpy as np
+import json
+import time
+
+import aggregates as agg
+import instrumentation
+import sql_engine
+import summaries
+from catalog import catalog
+from data_loader import read_preview
+from drilldown import DRILL_DIMENSIONS, DRILL_MEASURES, DeltaTables
+from filters import FILTER_DIMENSIONS
+from instrumentation import stage
+from render_cache import render_cache, render_png
+from sections import SECTIONS_BY_ID, prefetch
+from store import store
+
+
+# Stages are only recorded with DRUG_DATA_PROFILE set
+run_trace = instrumentation.begin('page')
+# end() must run however the page exits, st.stop() and st.rerun() included
+try:
+    # With DRUG_DATA_CHUNKSIZE set the export is streamed into the aggregates
+    # and the full row set is never held in memory
+    streaming = agg.STREAM_CHUNKSIZE is not None
+    # One snapshot per run: every session shares the same cube, rows and
+    # memoized rollups, and a refresh mid-run doesn't mix data versions
+    with stage('setup'):
+        snapshot = store.current()
+        index = snapshot.index
+        data = snapshot.data
+        data_key = snapshot.key
+
+    for reason in catalog.rejections():
+        st.warning(f"Left out {reason}; remove it or the export it overlaps to load it.")
+
+    st.sidebar.markdown("## Filters")
+    selection = {
+        dim: st.sidebar.multiselect(dim, index.options[dim], placeholder="All")
+        for dim in FILTER_DIMENSIONS
+    }
+    filter_key = index.normalize(selection)
+
+    with st.sidebar.expander("Render cache"):
+        st.json(render_cache.stats())
+
+    # Interactive charts are drawn by the browser from the aggregate table; the
+    # static backend rasterizes matplotlib figures on the server
+    interactive = st.sidebar.radio(
+        "Charts", ["Interactive", "Static images"], key="chart_backend",
+        help="Interactive charts zoom and show tooltips in the browser; charts without an interactive version are always static"
+    ) == "Interactive"
+
+    expand_all = st.sidebar.toggle(
+        "Expand all sections", key="expand_all", help="Compute every section on load instead of when it is opened"
+    )
+
+
+    def show_chart(chart_id, draw, *args):
+        image = render_png(chart_id, filter_key, data_key, draw, *args)
+        with stage(f'transfer.{chart_id}', bytes=len(image)):
+            st.image(image, width="stretch")
+
+
+    def section_container(section_id, label="Show chart"):
+        # Collapsed sections aren't computed at all; opening one reruns the page
+        if expand_all:
+            return st.container(), True
+        expander = st.expander(label, key=f'section-{section_id}', on_change="rerun")
+        return expander, expander.open
+
+
+    def show_section(section_id, lazy=True):
+        """Draw a registered section if it is open; return its container and rollup."""
+        section = SECTIONS_BY_ID[section_id]
+        container, is_open = section_container(section_id) if lazy else (st.container(), True)
+        if not is_open:
+            return container, None
+        with stage(f'section.{section_id}'), container:
+            result = index.rollup(filter_key, section.rollup)
+            for chart_id, _, draw, args in section.chart_jobs(result):
+                if interactive and section.spec is not None:
+                    with stage(f'spec.{chart_id}'):
+                        chart_data, spec = section.spec(*args)
+                    with stage(f'transfer.{chart_id}', rows=len(chart_data)):
+                        st.vega_lite_chart(chart_data, spec, width="stretch", theme=None)
+                else:
+                    show_chart(chart_id, draw, *args)
+        return container, result
+
+
+    if len(index.view(filter_key)) == 0:
+        st.warning("No seizures match the selected filters.")
+        st.stop()
+
+    head_display = read_preview(next(iter(catalog.files))) if streaming else data.head(10)
+    head_display
+
+    st.markdown("---")
+
+    st.markdown("## Dataset Description")
+
+    st.markdown("The dataset includes detailed information about drug seizures across various regions in the United States. Key attributes of the dataset are as follows:")
 
+    st.markdown("- **Region**: The geographical area where the event occurred.")
+    st.markdown("- **Drug Type**: The type of drug involved in the seizure.")
+    st.markdown("- **Count of Event**: The number of incidents or seizures recorded for a specific drug type.")
+    st.markdown("- **Sum Qty (lbs)**: The total weight of drugs seized, measured in pounds.")
+    st.markdown("- **Land Filter**: Indicates the mode of trafficking.")
+    st.markdown("- **Component**: The enforcement agency responsible for the seizure.")
+
+    st.markdown("### Observations:")
+    st.markdown("- The dataset spans multiple years and includes detailed records, enabling temporal and regional analyses.")
+    st.markdown("- Drug types show significant variation in quantity and frequency across regions.")
+    st.markdown("- The dataset provides a strong foundation for understanding trafficking patterns and enforcement effectiveness.")
 
-plt.style.use('dark_background')
-data = pd.read_csv('nationwide-drugs-fy21-fy24.csv')
+    st.markdown("---")
 
-data.rename(columns={'Sum Qty (lbs)': 'Weight (lbs)'}, inplace=True)
-data['Land Filter'] = data['Land Filter'].str.strip().str.upper()
+    st.markdown("### Total Weight by Drug Type")
+    show_section('total_weight_by_drug', lazy=False)
 
-head_display = data.head(10)
-head_display
+    st.markdown("---")
 
-st.markdown("---")
-
-st.markdown("## Dataset Description")
-
-st.markdown("The dataset includes detailed information about drug seizures across various regions in the United States. Key attributes of the dataset are as follows:")
-
-st.markdown("- **Region**: The geographical area where the event occurred.")
-st.markdown("- **Drug Type**: The type of drug involved in the seizure.")
-st.markdown("- **Count of Event**: The number of incidents or seizures recorded for a specific drug type.")
-st.markdown("- **Sum Qty (lbs)**: The total weight of drugs seized, measured in pounds.")
-st.markdown("- **Land Filter**: Indicates the mode of trafficking.")
-st.markdown("- **Component**: The enforcement agency responsible for the seizure.")
-
-st.markdown("### Observations:")
-st.markdown("- The dataset spans multiple years and includes detailed records, enabling temporal and regional analyses.")
-st.markdown("- Drug types show significant variation in quantity and frequency across regions.")
-st.markdown("- The dataset provides a strong foundation for understanding trafficking patterns and enforcement effectiveness.")
-
-st.markdown("---")
-
-st.markdown("### Total Weight by Drug Type")
-total_weight_by_drug = data.groupby('Drug Type')['Weight (lbs)'].sum()
-
-
-plt.figure(figsize=(12, 6))
-total_weight_by_drug.sort_values(ascending=False).plot(kind='bar', color='sandybrown', zorder=2)
-plt.title('Total Weight by Drug Type', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Drug Type', fontsize=12)
-plt.ylabel('Total Weight (lbs)', fontsize=12)
-plt.xticks(rotation=45, ha='right')
-plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
-st.pyplot(plt.gcf())
-
-st.markdown("---")
-
-st.markdown("The bar chart above illustrates the total weight of different drug types seized, measured in pounds. The analysis reveals the following key insights:")
+    st.markdown("The bar chart above illustrates the total weight of different drug types seized, measured in pounds. The analysis reveals the following key insights:")
 
-st.markdown("**Questions Addressed**:")
-st.markdown("1. Which drugs are most prevalent by weight?")
-st.markdown("2. How does the distribution of synthetic drugs compare to traditional ones?")
+    st.markdown("**Questions Addressed**:")
+    st.markdown("1. Which drugs are most prevalent by weight?")
+    st.markdown("2. How does the distribution of synthetic drugs compare to traditional ones?")
 
-st.markdown("### Key Observations:")
-st.markdown("1. **Marijuana** dominates the dataset, accounting for the highest weight among all drug types, far exceeding others.")
-st.markdown("2. **Methamphetamine** and **Khat (Catha Edulis)** also contribute significantly to the total weight, indicating their prevalence in drug trafficking activities.")
-st.markdown("3. **Cocaine** follows as another prominent drug type, although its total weight is considerably lower than the top three.")
-st.markdown("4. Other drugs, including **Fentanyl**, **Ketamine**, and **Heroin**, have much lower quantities in comparison but are still critical due to their potency and impact.")
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Marijuana** dominates the dataset, accounting for the highest weight among all drug types, far exceeding others.")
+    st.markdown("2. **Methamphetamine** and **Khat (Catha Edulis)** also contribute significantly to the total weight, indicating their prevalence in drug trafficking activities.")
+    st.markdown("3. **Cocaine** follows as another prominent drug type, although its total weight is considerably lower than the top three.")
+    st.markdown("4. Other drugs, including **Fentanyl**, **Ketamine**, and **Heroin**, have much lower quantities in comparison but are still critical due to their potency and impact.")
 
-st.markdown("### Insights:")
-st.markdown("- **Marijuana**'s overwhelming dominance highlights its widespread nature in trafficking and seizures.")
-st.markdown("- The presence of synthetic drugs like **Methamphetamine** and **Fentanyl** indicates the evolving nature of drug production and distribution.")
+    st.markdown("### Insights:")
+    st.markdown("- **Marijuana**'s overwhelming dominance highlights its widespread nature in trafficking and seizures.")
+    st.markdown("- The presence of synthetic drugs like **Methamphetamine** and **Fentanyl** indicates the evolving nature of drug production and distribution.")
 
-st.markdown("---")
+    st.markdown("---")
 
-st.markdown("### Regional Trends for Top 5 Drugs")
-top_5_drugs = total_weight_by_drug.nlargest(5).index
-region_drug_trends = data.groupby(['Region', 'Drug Type'])['Weight (lbs)'].sum().unstack()
+    st.markdown("### Regional Trends for Top 5 Drugs")
+    show_section('region_trends_top5')
 
-region_drug_trends_top5 = region_drug_trends[top_5_drugs]
+    st.markdown("---")
 
-# Plotting
-region_drug_trends_top5.plot(kind='bar', figsize=(14, 8), colormap='YlOrRd', zorder=2)
-plt.title('Total Weight of Top 5 Drugs by Region', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Region', fontsize=12)
-plt.ylabel('Total Weight (lbs)', fontsize=12)
-plt.legend(title='Drug Type', fontsize=10)
-plt.xticks(rotation=45)
-plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
-st.pyplot(plt.gcf())
+    st.markdown("The bar chart above illustrates the total weight (in pounds) of the top 5 drugs seized across different regions. Each bar represents a drug type within a specific region, providing insights into the geographical distribution of drug seizures.")
 
-st.markdown("---")
+    st.markdown("### Questions Answered:")
+    st.markdown("1. How does the contribution of specific drugs vary across regions?")
+    st.markdown("2. Are there significant differences in drug types across regions?")
+    st.markdown("3. Are there specific drugs that should be prioritized for enforcement in certain regions?")
 
-st.markdown("The bar chart above illustrates the total weight (in pounds) of the top 5 drugs seized across different regions. Each bar represents a drug type within a specific region, providing insights into the geographical distribution of drug seizures.")
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Coastal/Interior Region**:")
+    st.markdown("   - This region shows the highest total weight across all drug types, with **Khat (Catha Edulis)** and **Cocaine** contributing significantly.")
+    st.markdown("   - **Marijuana** also forms a substantial part of the seizures in this region.")
 
-st.markdown("### Questions Answered:")
-st.markdown("1. How does the contribution of specific drugs vary across regions?")
-st.markdown("2. Are there significant differences in drug types across regions?")
-st.markdown("3. Are there specific drugs that should be prioritized for enforcement in certain regions?")
+    st.markdown("2. **Northern Border**:")
+    st.markdown("   - **Marijuana** dominates the seizures in this region, with relatively smaller contributions from other drug types.")
 
-st.markdown("### Key Observations:")
-st.markdown("1. **Coastal/Interior Region**:")
-st.markdown("   - This region shows the highest total weight across all drug types, with **Khat (Catha Edulis)** and **Cocaine** contributing significantly.")
-st.markdown("   - **Marijuana** also forms a substantial part of the seizures in this region.")
+    st.markdown("3. **Southwest Border**:")
+    st.markdown("   - **Methamphetamine** leads the drug seizures in this region, followed by Marijuana.")
+    st.markdown("   - Other drugs such as Cocaine and Khat are less prominent here.")
 
-st.markdown("2. **Northern Border**:")
-st.markdown("   - **Marijuana** dominates the seizures in this region, with relatively smaller contributions from other drug types.")
+    st.markdown("### Insights:")
+    st.markdown("- The **Coastal/Interior** region has a diverse and high-volume distribution of drug types, indicating it as a critical area for trafficking activities.")
+    st.markdown("- **Methamphetamine** dominates in the **Southwest Border**, suggesting a focus on synthetic drug trafficking in this area.")
+    st.markdown("- **Marijuana** remains a consistent and significant contributor across all regions.")
 
-st.markdown("3. **Southwest Border**:")
-st.markdown("   - **Methamphetamine** leads the drug seizures in this region, followed by Marijuana.")
-st.markdown("   - Other drugs such as Cocaine and Khat are less prominent here.")
+    st.markdown("---")
 
-st.markdown("### Insights:")
-st.markdown("- The **Coastal/Interior** region has a diverse and high-volume distribution of drug types, indicating it as a critical area for trafficking activities.")
-st.markdown("- **Methamphetamine** dominates in the **Southwest Border**, suggesting a focus on synthetic drug trafficking in this area.")
-st.markdown("- **Marijuana** remains a consistent and significant contributor across all regions.")
+    st.markdown("### Monthly Trends in Top 3 Drug Types by Weight")
 
-st.markdown("---")
+    show_section('monthly_trends_top3')
 
-st.markdown("### Monthly Trends in Top 3 Drug Types by Weight")
+    st.markdown("The line chart above displays the monthly trends in the total weight (in pounds) of the top 3 drug types seized. This visualization helps in understanding the temporal patterns for the most significant drug types.")
 
-top_3_drugs = total_weight_by_drug.nlargest(3).index
-region_drug_trends = data.groupby(['Region', 'Drug Type'])['Weight (lbs)'].sum().unstack()
+    st.markdown("### Questions Answered:")
+    st.markdown("1. Are there specific months with consistently high activity for any of the top 3 drugs?")
+    st.markdown("2. Do the trends indicate any emerging or declining popularity of specific drugs over the months?")
+    st.markdown("3. Can these monthly trends guide enforcement agencies in planning resource allocation for high-activity periods?")
 
-month_order = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
-drug_trends = data.groupby(['Month (abbv)', 'Drug Type'])['Weight (lbs)'].sum().unstack()
-drug_trends = drug_trends.reindex(month_order)
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Marijuana**:")
+    st.markdown("   - Consistently shows high weights throughout the year, with noticeable peaks in specific months.")
+    st.markdown("   - Suggests consistent trafficking activity with periodic spikes.")
 
-# Plotting
-drug_trends[top_3_drugs].plot(figsize=(12, 8), marker='o', colormap='YlOrRd')
-plt.title('Monthly Trends in Top 3 Drug Types by Weight', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Month', fontsize=12)
-plt.ylabel('Total Weight (lbs)', fontsize=12)
-plt.legend(title='Drug Type', fontsize=10)
-plt.grid(axis='both', linestyle='--', alpha=0.0)
-plt.xticks(rotation=45)
-st.pyplot(plt.gcf())
+    st.markdown("2. **Methamphetamine**:")
+    st.markdown("   - Exhibits more fluctuation compared to **Marijuana**, with significant peaks and drops across the months.")
+    st.markdown("   - Indicates seasonality or specific operational patterns in trafficking.")
 
-st.markdown("The line chart above displays the monthly trends in the total weight (in pounds) of the top 3 drug types seized. This visualization helps in understanding the temporal patterns for the most significant drug types.")
+    st.markdown("3. **Khat (Catha Edulis)**:")
+    st.markdown("   - Displays irregular patterns with occasional spikes, suggesting occasional trafficking events rather than steady activity.")
 
-st.markdown("### Questions Answered:")
-st.markdown("1. Are there specific months with consistently high activity for any of the top 3 drugs?")
-st.markdown("2. Do the trends indicate any emerging or declining popularity of specific drugs over the months?")
-st.markdown("3. Can these monthly trends guide enforcement agencies in planning resource allocation for high-activity periods?")
+    st.markdown("### Insights:")
+    st.markdown("- The temporal trends highlight the need for region-specific and time-sensitive enforcement measures.")
+    st.markdown("- Spikes in specific months can help law enforcement focus their resources during high-activity periods for certain drugs.")
+    st.markdown("- The fluctuation in Methamphetamine and Khat activities may correspond to changes in supply chains or enforcement effectiveness.")
 
-st.markdown("### Key Observations:")
-st.markdown("1. **Marijuana**:")
-st.markdown("   - Consistently shows high weights throughout the year, with noticeable peaks in specific months.")
-st.markdown("   - Suggests consistent trafficking activity with periodic spikes.")
+    st.markdown("---")
 
-st.markdown("2. **Methamphetamine**:")
-st.markdown("   - Exhibits more fluctuation compared to **Marijuana**, with significant peaks and drops across the months.")
-st.markdown("   - Indicates seasonality or specific operational patterns in trafficking.")
+    st.markdown("### Monthly Trends in Top 3 Drug Types by Events per year")
 
-st.markdown("3. **Khat (Catha Edulis)**:")
-st.markdown("   - Displays irregular patterns with occasional spikes, suggesting occasional trafficking events rather than steady activity.")
+    # One plot per year
+    yearly_section, top_3 = show_section('yearly_top3_events')
+    if top_3 is not None:
+       top_3_pivots, top_3_peaks = top_3
+       yearly_section.download_button(
+          "Download peak months table (CSV)",
+          top_3_peaks.to_csv(index=False),
+          file_name='top3_drug_peaks_by_year.csv',
+          mime='text/csv',
+       )
 
-st.markdown("### Insights:")
-st.markdown("- The temporal trends highlight the need for region-specific and time-sensitive enforcement measures.")
-st.markdown("- Spikes in specific months can help law enforcement focus their resources during high-activity periods for certain drugs.")
-st.markdown("- The fluctuation in Methamphetamine and Khat activities may correspond to changes in supply chains or enforcement effectiveness.")
+    st.markdown("---")
 
-st.markdown("---")
+    st.markdown("This visualization analyzes the monthly trends in the top 3 drug types for each year based on the number of events. We approached to events, as although we considered the weight analsis, it cannot be trusted as some synthetic drugs which weigh less, can be as bad of a problem as traditional drugs. The chart displays separate lines for each drug type, showing how their activity fluctuates over the months.")
 
-st.markdown("### Monthly Trends in Top 3 Drug Types by Events per year")
-
-filtered_data_no_other = data[data['Drug Type'] != 'Other Drugs**']
-top_3_drugs_per_year = (
-   filtered_data_no_other.groupby(['FY', 'Drug Type'])['Count of Event']
-   .sum()
-   .reset_index()
-   .sort_values(by=['FY', 'Count of Event'], ascending=[True, False])
-)
-
-# Create a dictionary of top 3 drugs per year
-top_3_per_year = (
-   top_3_drugs_per_year.groupby('FY')['Drug Type']
-   .apply(lambda x: x.head(3).tolist())
-   .to_dict()
-)
-
-# Generate plots for each year
-unique_years = sorted(filtered_data_no_other['FY'].unique())
-
-for year in unique_years:
-   # Filter data for the year and top 3 drugs
-   year_top_3_drugs = top_3_per_year[year]
-   year_data = filtered_data_no_other[
-      (filtered_data_no_other['FY'] == year) & (filtered_data_no_other['Drug Type'].isin(year_top_3_drugs))
-      ]
-
-   # Aggregating monthly data for the top 3 drugs
-   monthly_data = year_data.groupby(['Month (abbv)', 'Drug Type'])['Count of Event'].sum().reset_index()
-
-   # Pivot data for plotting
-   monthly_pivot = monthly_data.pivot_table(
-      index='Month (abbv)', columns='Drug Type', values='Count of Event', fill_value=0
-   )
-
-   # Sorting months for proper order
-   monthly_pivot = monthly_pivot.reindex(month_order)
-
-   # Plotting the data
-   ax = monthly_pivot.plot(kind='line', figsize=(12, 6), zorder=2)
-
-   for drug in year_top_3_drugs:
-      if drug in monthly_pivot.columns:
-         peak_month = monthly_pivot[drug].idxmax()
-         peak_value = monthly_pivot[drug].max()
-         peak_index = month_order.index(peak_month)
-         ax.plot(peak_index, peak_value, marker='v', color='sandybrown', markersize=8)
-         ax.text(
-            peak_index, peak_value + 25, 'Peak', fontsize=9, color='sandybrown', ha='center'
-         )
-
-   plt.title(f'Monthly Trends for Top 3 Drugs in {year}', fontsize=14, fontweight='bold', color='lime')
-   plt.xlabel('Month')
-   plt.ylabel('Number of Events')
-   plt.xticks(rotation=45)
-   plt.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
-   plt.tight_layout()
-   plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
-   plt.grid(axis='x', linestyle='--', alpha=0.7, zorder=1)
-   st.pyplot(plt.gcf())
+    st.markdown("### Questions Answered")
+    st.markdown("1. Are there discernible patterns that indicate emerging or declining trafficking trends for specific drugs?")
+    st.markdown("2. Do the trends indicate any emerging or declining popularity of specific drugs over the years?")
+    st.markdown("3. Can this data aid enforcement agencies in identifying peak periods for focused intervention?")
 
-st.markdown("---")
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Drug-Specific Observations**:")
+    st.markdown("   - **Marijuana**:")
+    st.markdown("     - Maintains a strong presence throughout the years with notable peaks, such as March in 2021 and July in 2024.")
+    st.markdown("   - **Methamphetamine**:")
+    st.markdown("     - Exhibits fluctuating patterns with prominent spikes, suggesting operational bursts in its trafficking supply chain.")
+    st.markdown("   - **Cocaine**:")
+    st.markdown("     - While less dominant, **Cocaine** displays a steady presence, with sporadic peaks indicating targeted trafficking efforts.")
 
-st.markdown("This visualization analyzes the monthly trends in the top 3 drug types for each year based on the number of events. We approached to events, as although we considered the weight analsis, it cannot be trusted as some synthetic drugs which weigh less, can be as bad of a problem as traditional drugs. The chart displays separate lines for each drug type, showing how their activity fluctuates over the months.")
+    st.markdown("2.  **Fluctuations in Seizures**:")
+    st.markdown("   - The varying patterns across months and years suggest adaptive strategies employed by traffickers to evade detection or capitalize on specific market demands.")
 
-st.markdown("### Questions Answered")
-st.markdown("1. Are there discernible patterns that indicate emerging or declining trafficking trends for specific drugs?")
-st.markdown("2. Do the trends indicate any emerging or declining popularity of specific drugs over the years?")
-st.markdown("3. Can this data aid enforcement agencies in identifying peak periods for focused intervention?")
+    st.markdown("### Insights:")
+    st.markdown("- **Marijuana** consistently appears as a dominant drug type across all years, reflecting its persistent trafficking trends.")
+    st.markdown("- Each year demonstrates distinct patterns for event counts, indicating potential shifts in trafficking trends or enforcement priorities.")
+    st.markdown("- **Methamphetamine** shows significant peaks in September for certain years, which may indicate seasonal trafficking trends or enforcement spikes.")
 
-st.markdown("### Key Observations:")
-st.markdown("1. **Drug-Specific Observations**:")
-st.markdown("   - **Marijuana**:")
-st.markdown("     - Maintains a strong presence throughout the years with notable peaks, such as March in 2021 and July in 2024.")
-st.markdown("   - **Methamphetamine**:")
-st.markdown("     - Exhibits fluctuating patterns with prominent spikes, suggesting operational bursts in its trafficking supply chain.")
-st.markdown("   - **Cocaine**:")
-st.markdown("     - While less dominant, **Cocaine** displays a steady presence, with sporadic peaks indicating targeted trafficking efforts.")
+    st.markdown("---")
 
-st.markdown("2.  **Fluctuations in Seizures**:")
-st.markdown("   - The varying patterns across months and years suggest adaptive strategies employed by traffickers to evade detection or capitalize on specific market demands.")
+    st.markdown("### Unusual Months by Area and Drug Type")
 
-st.markdown("### Insights:")
-st.markdown("- **Marijuana** consistently appears as a dominant drug type across all years, reflecting its persistent trafficking trends.")
-st.markdown("- Each year demonstrates distinct patterns for event counts, indicating potential shifts in trafficking trends or enforcement priorities.")
-st.markdown("- **Methamphetamine** shows significant peaks in September for certain years, which may indicate seasonal trafficking trends or enforcement spikes.")
+    spike_section, spike_result = show_section('event_spikes')
+    if spike_result is not None:
+       spikes = spike_result[0]
+       if spikes.empty:
+          spike_section.info("No unusual months for this selection.")
+       else:
+          spike_section.dataframe(spikes.head(100), hide_index=True, width="stretch")
+          spike_section.download_button(
+             "Download unusual months table (CSV)",
+             spikes.to_csv(index=False),
+             file_name='unusual_months_by_area_and_drug.csv',
+             mime='text/csv',
+          )
 
-st.markdown("---")
+    st.markdown("Rather than a single peak per year, every month of every Area and Drug Type series is compared with that series' own previous 12 months. The score is how many spreads (the median absolute deviation, or the Poisson spread for sparse series) the month lies above the 12-month median; months scoring 3.5 or more with at least 5 events are listed above, highest score first, and marked on the chart for the five series with the strongest spikes.")
 
-st.markdown("### Share of Each Drug Types over Time")
+    st.markdown("---")
 
-#Preparing data
-time_series = data.groupby(['FY', 'Month (abbv)', 'Drug Type'])[['Count of Event']].sum().reset_index()
+    st.markdown("### Share of Each Drug Types over Time")
 
-area_chart_data = time_series.pivot_table(index=['FY', 'Month (abbv)'], columns='Drug Type', values='Count of Event', aggfunc='sum', fill_value=0).reset_index()
+    show_section('drug_share_over_time')
 
-# Aggregating data for visualization
-area_chart_data['Month-Year'] = area_chart_data['FY'].astype(str) + " " + area_chart_data['Month (abbv)']
-area_chart_data = area_chart_data.drop(columns=['FY', 'Month (abbv)']).set_index('Month-Year')
+    st.markdown("---")
 
-# Stacked area chart
-area_chart_data.plot(kind='area', figsize=(14, 8), stacked=True, colormap='tab10', zorder=2)
-plt.title('Share of Drug Types Over Time', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Month-Year')
-plt.ylabel('Number of Events')
-plt.xticks(rotation=45)
-plt.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
-plt.tight_layout()
-st.pyplot(plt.gcf())
+    st.markdown("The stacked area chart above represents the share of different drug types over time, measured by the number of events in each month-year. The visualization provides insights into how the distribution of drug types has evolved over time.")
 
-st.markdown("---")
+    st.markdown("### Questions Answered:")
+    st.markdown("1. How does the volume of seizures for specific drug types fluctuate within the observed timeframe?")
+    st.markdown("2. Are there any noticeable trends or consistent patterns in the share of specific drugs over the months and years?")
+    st.markdown("3. Which drug types consistently dominate the share of seizures?")
 
-st.markdown("The stacked area chart above represents the share of different drug types over time, measured by the number of events in each month-year. The visualization provides insights into how the distribution of drug types has evolved over time.")
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Marijuana**:")
+    st.markdown("   - Consistently contributes the largest share of events over time, with fluctuations indicating possible changes in trafficking activity.")
+    st.markdown("2. **Other Drugs**:")
+    st.markdown("- This category forms a significant proportion of the events, highlighting the diversity of lesser-known drug types.")
+    st.markdown("3. **Methamphetamine and Cocaine**:")
+    st.markdown("- These drugs show noticeable activity, with **Methamphetamine** maintaining a consistent presence.")
+    st.markdown("4. **Emerging Trends**:")
+    st.markdown("- Drugs like **Fentanyl** and **Khat (Catha Edulis)** show irregular but increasing trends, indicating their growing importance.")
 
-st.markdown("### Questions Answered:")
-st.markdown("1. How does the volume of seizures for specific drug types fluctuate within the observed timeframe?")
-st.markdown("2. Are there any noticeable trends or consistent patterns in the share of specific drugs over the months and years?")
-st.markdown("3. Which drug types consistently dominate the share of seizures?")
+    st.markdown("### Insights:")
+    st.markdown("- The dominance of **Marijuana** suggests it remains a primary focus for enforcement efforts.")
+    st.markdown("- The relative stability of certain drugs like **Methamphetamine** contrasts with the fluctuating presence of others, hinting at differences in supply chains or enforcement success.")
+    st.markdown("- The temporal trends help in identifying months or periods with spikes, allowing for targeted interventions.")
 
-st.markdown("### Key Observations:")
-st.markdown("1. **Marijuana**:")
-st.markdown("   - Consistently contributes the largest share of events over time, with fluctuations indicating possible changes in trafficking activity.")
-st.markdown("2. **Other Drugs**:")
-st.markdown("- This category forms a significant proportion of the events, highlighting the diversity of lesser-known drug types.")
-st.markdown("3. **Methamphetamine and Cocaine**:")
-st.markdown("- These drugs show noticeable activity, with **Methamphetamine** maintaining a consistent presence.")
-st.markdown("4. **Emerging Trends**:")
-st.markdown("- Drugs like **Fentanyl** and **Khat (Catha Edulis)** show irregular but increasing trends, indicating their growing importance.")
+    st.markdown("---")
 
-st.markdown("### Insights:")
-st.markdown("- The dominance of **Marijuana** suggests it remains a primary focus for enforcement efforts.")
-st.markdown("- The relative stability of certain drugs like **Methamphetamine** contrasts with the fluctuating presence of others, hinting at differences in supply chains or enforcement success.")
-st.markdown("- The temporal trends help in identifying months or periods with spikes, allowing for targeted interventions.")
+    st.markdown("### Monthly Events of Top Drug Types")
 
-st.markdown("---")
+    trends_section, trends = show_section('drug_event_trends')
+    if trends is not None and trends.columns.empty:
+       trends_section.info("No drug types other than Other Drugs** match the selected filters.")
 
+    st.markdown("The lines above smooth each drug type's monthly event count with a 3-month rolling mean, so sustained rises and declines stand out from single-month spikes. Months follow the fiscal calendar: FY 2021 starts in October 2020.")
 
-st.markdown("### Stacked Bar Chart: Events by Drug Type for Top 10 Areas")
-data['Area'] = data['Area of Responsibility'].str.replace(" FIELD OFFICE", "", regex=False)
+    st.markdown("### Year-over-Year Change in Monthly Events")
 
-treemap_data = data.groupby(['Area', 'Drug Type'])['Count of Event'].sum().reset_index()
+    yoy_section, yoy = show_section('drug_event_yoy')
+    if yoy is not None and yoy.empty:
+       yoy_section.info("Year-over-year changes need two consecutive fiscal years, and a drug type other than Other Drugs**, in the filtered data.")
 
+    st.markdown("Each line shows how many more (or fewer) events a drug type had in a month than in the same fiscal month of the previous fiscal year; hover for the percentage change. The first fiscal year has nothing to compare with, so it is left out.")
 
-# Constructing labels for the treemap
-treemap_data['Label'] = (
-    treemap_data['Area'] + "\n" + treemap_data['Drug Type'] + "\n" +
-    treemap_data['Count of Event'].astype(str) + " events"
-)
+    st.markdown("### Seasonal Pattern of Events by Fiscal Month")
 
+    seasonal_section, seasonal_profile = show_section('drug_seasonality')
+    if seasonal_profile is not None and seasonal_profile.columns.empty:
+       seasonal_section.info("No drug types other than Other Drugs** match the selected filters.")
+    elif seasonal_profile is not None and not seasonal_profile.notna().any().any():
+       seasonal_section.info("The seasonal pattern compares each month with a 12-month trend, so it needs more than one fiscal year in the filtered data.")
 
-top_aors = treemap_data.groupby('Area')['Count of Event'].sum().nlargest(10).index
-top_aors_data = treemap_data[treemap_data['Area'].isin(top_aors)]
+    st.markdown("Each line shows how far a drug type's events typically sit above or below its 12-month trend in each fiscal month, averaged over all years. Values near zero mean the month is typical; consistent positive or negative values point to seasonal highs and lows.")
 
-pivot_data = top_aors_data.pivot_table(
-    index='Area',
-    columns='Drug Type',
-    values='Count of Event',
-    aggfunc='sum',
-    fill_value=0
-)
+    st.markdown("---")
 
-# Visualizing the treemap using a bar chart alternative
-pivot_data.plot(kind='bar', stacked=True, figsize=(14, 8), colormap='tab10', zorder=2)
-plt.title('Stacked Bar Chart: Events by Drug Type for Top 10 Areas', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Area')
-plt.ylabel('Number of Events')
-plt.xticks(rotation=45, ha='right')
-plt.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
-plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
-st.pyplot(plt.gcf())
 
-st.markdown("---")
+    st.markdown("### Stacked Bar Chart: Events by Drug Type for Top 10 Areas")
+    # Visualizing the treemap using a bar chart alternative
+    show_section('top_areas_events')
 
-st.markdown("The stacked bar chart above showcases the distribution of drug-related events across the top 10 areas of responsibility. Each bar represents the total number of events in a specific area, broken down by drug type.")
+    st.markdown("---")
 
-st.markdown("### Questions Answered:")
-st.markdown("1. Are specific areas dominated by certain drug types, indicating localized trafficking patterns?")
-st.markdown("2. Do larger metropolitan areas show a higher diversity of drug types compared to smaller cities?")
-st.markdown("3. What insights can be drawn regarding the consistency or variability of drug presence across the top regions?")
+    st.markdown("The stacked bar chart above showcases the distribution of drug-related events across the top 10 areas of responsibility. Each bar represents the total number of events in a specific area, broken down by drug type.")
 
-st.markdown("### Key Observations:")
-st.markdown("1. **New York**:")
-st.markdown("   - This area has the highest number of drug-related events, with a significant contribution from **Other Drugs** and **Marijuana**.")
-st.markdown("2. **Chicago and Miami**:")
-st.markdown("   - These areas also show high levels of activity, with **Methamphetamine** and **Cocaine** contributing prominently.")
-st.markdown("3. **Regional Trends**:")
-st.markdown("   - Some areas, like **San Francisco** and **Seattle**, show a more evenly distributed mix of drug types, indicating diverse trafficking patterns.")
+    st.markdown("### Questions Answered:")
+    st.markdown("1. Are specific areas dominated by certain drug types, indicating localized trafficking patterns?")
+    st.markdown("2. Do larger metropolitan areas show a higher diversity of drug types compared to smaller cities?")
+    st.markdown("3. What insights can be drawn regarding the consistency or variability of drug presence across the top regions?")
 
-st.markdown("### Insights:")
-st.markdown("- The dominance of certain areas like **New York** and **Chicago** suggests these are critical hotspots for drug-related activities.")
-st.markdown("- The variation in drug type contributions across areas indicates that trafficking strategies and enforcement challenges vary geographically.")
-st.markdown("- Targeted enforcement efforts in the highlighted areas could significantly reduce the overall impact of drug trafficking.")
+    st.markdown("### Key Observations:")
+    st.markdown("1. **New York**:")
+    st.markdown("   - This area has the highest number of drug-related events, with a significant contribution from **Other Drugs** and **Marijuana**.")
+    st.markdown("2. **Chicago and Miami**:")
+    st.markdown("   - These areas also show high levels of activity, with **Methamphetamine** and **Cocaine** contributing prominently.")
+    st.markdown("3. **Regional Trends**:")
+    st.markdown("   - Some areas, like **San Francisco** and **Seattle**, show a more evenly distributed mix of drug types, indicating diverse trafficking patterns.")
 
-st.markdown("---")
+    st.markdown("### Insights:")
+    st.markdown("- The dominance of certain areas like **New York** and **Chicago** suggests these are critical hotspots for drug-related activities.")
+    st.markdown("- The variation in drug type contributions across areas indicates that trafficking strategies and enforcement challenges vary geographically.")
+    st.markdown("- Targeted enforcement efforts in the highlighted areas could significantly reduce the overall impact of drug trafficking.")
 
-st.markdown("### Regional Distribution of Events by Land Filter")
-regional_land_filter = data.groupby(['Region', 'Land Filter'])['Count of Event'].sum().unstack(fill_value=0)
+    st.markdown("---")
 
-# Plotting a stacked bar chart for events by region and land filter
-regional_land_filter.plot(kind='bar', stacked=True, figsize=(14, 8), colormap='YlOrRd', zorder=2)
-plt.title('Regional Distribution of Events by Land Filter', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Region')
-plt.ylabel('Number of Events')
-plt.xticks(rotation=45, ha='right')
-plt.legend(title='Land Filter', bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.grid(axis='both', linestyle='--', alpha=0.7, zorder=1)
-plt.tight_layout()
-st.pyplot(plt.gcf())
+    st.markdown("### Map of Events by Area of Responsibility")
 
-st.markdown("---")
-st.markdown("The bar chart above illustrates the regional distribution of drug-related events, categorized by the **Land Filter** variable, which identifies whether the seizure occurred via land or other methods.")
-
-st.markdown("### Questions Answered:")
-st.markdown("1. Which regions have the highest number of drug events?")
-st.markdown("2. Does the high volume of events in the Coastal/Interior region suggest gaps in monitoring non-land-based methods?")
-st.markdown("3. Are certain regions more reliant on land-based trafficking compared to others?")
-
-st.markdown("### Key Observations:")
-st.markdown("1. **Coastal/Interior Region**:")
-st.markdown("- This region dominates the chart, with the majority of events categorized as **OTHER**.")
-st.markdown("- Indicates significant activity involving non-land-based trafficking methods.")
-st.markdown("2. **Southwest Border**:")
-st.markdown("- This region has the highest number of **LAND ONLY** events, suggesting land is the predominant mode of trafficking.")
-st.markdown("3. **Northern Border**:")
-st.markdown("- Exhibits relatively low event counts compared to other regions, with a mix of both land and other modes.")
-
-st.markdown("### Insights:")
-st.markdown("- The **Coastal/Interior region's dominance** in \"OTHER\" events highlights its role as a key trafficking hub for non-land methods.")
-st.markdown("- The **Southwest Border** is heavily reliant on land routes, suggesting that enforcement efforts in this region should focus on land-based transportation methods.")
-st.markdown("- Understanding these distributions helps prioritize resources for specific regions and trafficking modes, enabling more efficient and targeted interventions.")
+    show_section('area_map')
 
-st.markdown("---")
+    st.markdown("Each circle is an Area of Responsibility, placed at its field office or Border Patrol sector headquarters and sized by its number of events. With interactive charts, pick a drug type under the map to show only its events; hover over a circle for its events and total weight. The map and locations are bundled with the app, so it works offline. Preclearance (CBP officers stationed at airports abroad) has no location and is not shown.")
 
-st.markdown("### Regional Contribution of Events by Component")
-regional_component_data = data.groupby(['Region', 'Component'])['Count of Event'].sum().unstack(fill_value=0)
-
-# Plotting a heatmap for regional contributions by component
-plt.figure(figsize=(12, 8))
-sns.heatmap(regional_component_data, annot=True, fmt="d", cmap="YlOrRd", linewidths=0.5, linecolor='black')
-plt.title('Regional Contribution of Events by Component', fontsize=14, fontweight='bold', color='lime')
-plt.xlabel('Component')
-plt.ylabel('Region')
-plt.tight_layout()
-st.pyplot(plt.gcf())
-
-st.markdown("The heatmap above visualizes the contribution of different components to drug-related events across various regions. The **Office of Field Operations** and **U.S. Border Patrol** are the two primary components contributing to the event counts.")
-
-st.markdown("### Questions Answered:")
-st.markdown("1. Which regions are predominantly handled by each enforcement component?")
-st.markdown("2. How do different regions contribute to the volume of drug-related events for each enforcement component?")
-st.markdown("3. Does the low activity in certain regions suggest gaps in operations by either of the components?")
-
-st.markdown("### Observations:")
-st.markdown("1. **Coastal/Interior Region**:")
-st.markdown("- The **Office of Field Operations** dominates, contributing the highest number of events (190,955), with minimal input from the **U.S. Border Patrol**.")
-st.markdown("2. **Southwest Border**:")
-st.markdown("- Both components contribute significantly, though the **Office of Field Operations** maintains a higher share.")
-st.markdown("3. **Northern Border**:")
-st.markdown("- The event count is relatively low compared to other regions, with a marginal contribution from the **U.S. Border Patrol**.")
-
-st.markdown("### Insights:")
-st.markdown("- The **Office of Field Operations** is the primary contributor across all regions, highlighting its critical role in enforcement activities.")
-st.markdown("- The **Southwest Border** sees a more balanced contribution from both components, suggesting varied enforcement strategies.")
-st.markdown("- The **Coastal/Interior region's** reliance on the **Office of Field Operations** suggests a focus on specific types of trafficking activities.")
+    st.markdown("---")
 
-st.markdown("---")
+    st.markdown("### Regional Distribution of Events by Land Filter")
+    # Plotting a stacked bar chart for events by region and land filter
+    show_section('region_land_filter')
 
-st.markdown("### Monthly Event Distribution on Polar Axis")
+    st.markdown("---")
+    st.markdown("The bar chart above illustrates the regional distribution of drug-related events, categorized by the **Land Filter** variable, which identifies whether the seizure occurred via land or other methods.")
 
-# Preparing data for a polar bar chart
-monthly_events = data.groupby('Month (abbv)')['Count of Event'].sum().reindex(month_order)
+    st.markdown("### Questions Answered:")
+    st.markdown("1. Which regions have the highest number of drug events?")
+    st.markdown("2. Does the high volume of events in the Coastal/Interior region suggest gaps in monitoring non-land-based methods?")
+    st.markdown("3. Are certain regions more reliant on land-based trafficking compared to others?")
 
-angles = np.linspace(0, 2 * np.pi, len(month_order), endpoint=False).tolist()
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Coastal/Interior Region**:")
+    st.markdown("- This region dominates the chart, with the majority of events categorized as **OTHER**.")
+    st.markdown("- Indicates significant activity involving non-land-based trafficking methods.")
+    st.markdown("2. **Southwest Border**:")
+    st.markdown("- This region has the highest number of **LAND ONLY** events, suggesting land is the predominant mode of trafficking.")
+    st.markdown("3. **Northern Border**:")
+    st.markdown("- Exhibits relatively low event counts compared to other regions, with a mix of both land and other modes.")
 
-# Plotting the bar chart on polar axis
-plt.figure(figsize=(10, 8))
-ax = plt.subplot(111, polar=True)
+    st.markdown("### Insights:")
+    st.markdown("- The **Coastal/Interior region's dominance** in \"OTHER\" events highlights its role as a key trafficking hub for non-land methods.")
+    st.markdown("- The **Southwest Border** is heavily reliant on land routes, suggesting that enforcement efforts in this region should focus on land-based transportation methods.")
+    st.markdown("- Understanding these distributions helps prioritize resources for specific regions and trafficking modes, enabling more efficient and targeted interventions.")
 
-bars = ax.bar(
-    angles, monthly_events, align='center', alpha=0.8, edgecolor="black",
-    color=plt.cm.YlOrRd(np.linspace(0, 1, len(month_order)))
-)
-
-ax.set_xticks(angles)
-ax.set_xticklabels(month_order, fontsize=10, fontweight='bold')
-ax.yaxis.grid(color='white', linestyle='--', linewidth=0.7)
-ax.spines['polar'].set_visible(False)
-ax.tick_params(axis='y', colors='red')
-ax.tick_params(axis='x', colors='black')
-for label in ax.get_yticklabels():
-    label.set_fontweight('bold')
-
-for label in ax.get_xticklabels():
-    label.set_bbox(dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.1'))
-
-
-plt.title('Monthly Event Distribution on Polar Axis', va='bottom', fontsize=14, fontweight='bold', color='lime')
-plt.tight_layout()
-st.pyplot(plt.gcf())
-
-st.markdown("---")
-
-st.markdown("The polar bar chart above visualizes the distribution of drug-related events across months, providing a unique perspective on temporal trends.")
-
-st.markdown("### Questions Answered:")
-st.markdown("1. Are there specific months with consistently higher event counts?")
-st.markdown("2. Can this temporal distribution guide resource allocation for high-activity periods?")
-st.markdown("3. Which months require intensified enforcement measures based on higher activity?")
-
-
-st.markdown("### Key Observations:")
-st.markdown("1. **Peak Months**:")
-st.markdown("- The highest activity is observed in **January**, as indicated by the longest and darkest bar.")
-st.markdown("2. **Seasonal Trends**:")
-st.markdown("- Activity gradually reduces in the summer months (**June–August**) and picks up towards the end of the year (**November–December**).")
-st.markdown("3. **Even Distribution**:")
-st.markdown("- Although some months like **January** and **February** stand out, there is a relatively even spread of events throughout the year, indicating consistent trafficking activity.")
-
-st.markdown("### Insights:")
-st.markdown("- The polar chart provides a clear visual representation of temporal trends, making it easy to identify seasonal peaks and troughs.")
-st.markdown("- Enforcement agencies can use this insight to allocate resources more effectively during high-activity months, especially at the start and end of the year.")
-st.markdown("- The consistent activity suggests that trafficking is a year-round issue, requiring continuous monitoring.")
-
-st.markdown("---")
-
-
-st.markdown("### Summary Statistics")
-summary_stats = data.describe()
-summary_stats
-
-st.markdown("---")
-
-st.markdown("## Conclusion")
-
-st.markdown("This project successfully conducted an in-depth Exploratory Data Analysis (EDA) on the Nationwide Drug Seizures dataset, uncovering key patterns, trends, and insights. The analysis focused on regional, temporal, and categorical distributions of drug-related events, providing valuable inputs for enforcement and policymaking.")
-
-st.markdown("### Summary of Key Findings:")
-st.markdown("1. **Regional Insights**:")
-st.markdown("   - The **Coastal/Interior Region** consistently recorded the highest number of drug-related events, largely dominated by non-land-based trafficking methods.")
-st.markdown("   - The **Southwest Border** showed significant land-based activity, highlighting its role in land trafficking.")
-
-st.markdown("2. **Drug Type Trends**:")
-st.markdown("   - **Marijuana** emerged as the most frequently seized drug across all regions and time periods.")
-st.markdown("   - Synthetic drugs like **Methamphetamine** and emerging substances like **Fentanyl** demonstrated fluctuating but growing trends, indicating evolving trafficking dynamics.")
-
-st.markdown("3. **Temporal Analysis**:")
-st.markdown("   - Seasonal trends were evident, with peak activity observed in **January** and a decline during the summer months.")
-st.markdown("   - The consistency of events across most months suggests that trafficking is not limited to specific periods but requires year-round enforcement efforts.")
-
-st.markdown("4. **Land and Component Contribution**:")
-st.markdown("   - The **Office of Field Operations** played a dominant role in enforcement activities across all regions, with the **U.S. Border Patrol** contributing significantly at the **Southwest Border**.")
-st.markdown("   - Regional variations in trafficking modes were clearly highlighted, aiding in understanding the operational challenges faced by different enforcement agencies.")
-
-st.markdown("---")
+    st.markdown("---")
 
-st.markdown("## References")
-
-st.markdown("1. **Libraries Used**:")
-st.markdown("   - **Pandas**: For data manipulation and cleaning. Documentation available at [Pandas Documentation](https://pandas.pydata.org/docs/).")
-st.markdown("   - **Matplotlib/Seaborn**: For data visualization. Documentation available at [Matplotlib Documentation](https://matplotlib.org/stable/contents.html) and [Seaborn Documentation](https://seaborn.pydata.org/).")
-st.markdown("- **NumPy**: For numerical analysis. Documentation available at [NumPy Documentation](https://numpy.org/doc/).")
-
-st.markdown("2. **Dataset Source**:")
-st.markdown("- [Nationwide Drug Seizures Dataset](https://www.cbp.gov/document/stats/nationwide-drug-seizures)")
-st.markdown("This dataset was used for exploratory data analysis and question-driven insights in this notebook.")
-
-st.markdown("3. **Large Language Models (LLMs)**:")
-st.markdown("- **ChatGPT** was used for generating text contributions to the notebook. The prompts used include:")
-st.markdown("     - \"Web scrape some ideas to show how to start an introduction explaining the purpose of using the Nationwide Drug Seizures dataset.\"")
-st.markdown("     - \"What are the best practices for a clean structure in a Jupyter Notebook, and how to beautify some parts of it.\"")
-st.markdown("     - \"Best practices when conducting Exploratory Data Analysis on a .csv dataset.\"")
-
-st.markdown("4. **Data Science Workflow Reference**:")
-st.markdown("   - O’Neil, C., & Schutt, R. (2014). *Doing Data Science* (1st ed.). O'Reilly Media.")
-st.markdown("     The data science workflow mentioned in the assignment was referenced during the project's development.")
-
-st.markdown("5. **Online Resources**:")
-st.markdown(
-   "   - **Markdown Syntax Reference**: [GitHub Markdown Documentation](https://docs.github.com/en/get-started/writing-on-github/getting-started-with-writing-and-formatting-on-github/basic-writing-and-formatting-syntax)")
-st.markdown("     Used to structure and format Markdown sections effectively.")
-st.markdown("   - **Python.org**: [Python Language Reference](https://docs.python.org/3/)")
-st.markdown("     Official documentation for Python programming language features used in this project.")
+    st.markdown("### Regional Contribution of Events by Component")
+    # Plotting a heatmap for regional contributions by component
+    show_section('region_component_heatmap')
+
+    st.markdown("The heatmap above visualizes the contribution of different components to drug-related events across various regions. The **Office of Field Operations** and **U.S. Border Patrol** are the two primary components contributing to the event counts.")
+
+    st.markdown("### Questions Answered:")
+    st.markdown("1. Which regions are predominantly handled by each enforcement component?")
+    st.markdown("2. How do different regions contribute to the volume of drug-related events for each enforcement component?")
+    st.markdown("3. Does the low activity in certain regions suggest gaps in operations by either of the components?")
+
+    st.markdown("### Observations:")
+    st.markdown("1. **Coastal/Interior Region**:")
+    st.markdown("- The **Office of Field Operations** dominates, contributing the highest number of events (190,955), with minimal input from the **U.S. Border Patrol**.")
+    st.markdown("2. **Southwest Border**:")
+    st.markdown("- Both components contribute significantly, though the **Office of Field Operations** maintains a higher share.")
+    st.markdown("3. **Northern Border**:")
+    st.markdown("- The event count is relatively low compared to other regions, with a marginal contribution from the **U.S. Border Patrol**.")
+
+    st.markdown("### Insights:")
+    st.markdown("- The **Office of Field Operations** is the primary contributor across all regions, highlighting its critical role in enforcement activities.")
+    st.markdown("- The **Southwest Border** sees a more balanced contribution from both components, suggesting varied enforcement strategies.")
+    st.markdown("- The **Coastal/Interior region's** reliance on the **Office of Field Operations** suggests a focus on specific types of trafficking activities.")
+
+    st.markdown("---")
+
+    st.markdown("### Monthly Event Distribution on Polar Axis")
+
+    # Plotting the bar chart on polar axis
+    show_section('monthly_events_polar')
+
+    st.markdown("---")
+
+    st.markdown("The polar bar chart above visualizes the distribution of drug-related events across months, providing a unique perspective on temporal trends.")
+
+    st.markdown("### Questions Answered:")
+    st.markdown("1. Are there specific months with consistently higher event counts?")
+    st.markdown("2. Can this temporal distribution guide resource allocation for high-activity periods?")
+    st.markdown("3. Which months require intensified enforcement measures based on higher activity?")
+
+
+    st.markdown("### Key Observations:")
+    st.markdown("1. **Peak Months**:")
+    st.markdown("- The highest activity is observed in **January**, as indicated by the longest and darkest bar.")
+    st.markdown("2. **Seasonal Trends**:")
+    st.markdown("- Activity gradually reduces in the summer months (**June–August**) and picks up towards the end of the year (**November–December**).")
+    st.markdown("3. **Even Distribution**:")
+    st.markdown("- Although some months like **January** and **February** stand out, there is a relatively even spread of events throughout the year, indicating consistent trafficking activity.")
+
+    st.markdown("### Insights:")
+    st.markdown("- The polar chart provides a clear visual representation of temporal trends, making it easy to identify seasonal peaks and troughs.")
+    st.markdown("- Enforcement agencies can use this insight to allocate resources more effectively during high-activity months, especially at the start and end of the year.")
+    st.markdown("- The consistent activity suggests that trafficking is a year-round issue, requiring continuous monitoring.")
+
+    st.markdown("---")
+
+    st.markdown("### What Changed between Fiscal Years")
+    st.markdown("Compare any two fiscal years and drill into the change. The table breaks the rows matching the filters down by one dimension, largest increase first. Click a row to break it down by the next dimension: a Region into its Areas, an Area into its Drug Types and so on. The path above the table goes back up.")
+    drill_section, drill_open = section_container('drilldown', "Explore changes")
+    if drill_open:
+        with drill_section:
+            deltas = index.rollup(filter_key, DeltaTables)
+            path = st.session_state.setdefault('drill_path', [])
+            # Bumped on every drill step, so each step starts with fresh widgets
+            step = st.session_state.setdefault('drill_step', 0)
+
+            def drill_up(depth):
+                del st.session_state['drill_path'][depth:]
+                st.session_state['drill_step'] += 1
+
+            if len(deltas.years) < 2:
+                st.info("Comparing needs at least two fiscal years in the filtered data.")
+            else:
+                measure_column, base_column, target_column = st.columns(3)
+                measure = measure_column.radio("Measure", DRILL_MEASURES, index=1, horizontal=True, key='drill_measure')
+                # The filters decide which years there are
+                years_key = '-'.join(map(str, deltas.years))
+                base = base_column.selectbox("From", deltas.years, index=len(deltas.years) - 2, key=f'drill-base-{years_key}')
+                target = target_column.selectbox("To", deltas.years, index=len(deltas.years) - 1, key=f'drill-target-{years_key}')
+
+                crumbs = st.columns(len(path) + 1)
+                crumbs[0].button("All", on_click=drill_up, args=(0,), key=f'drill-crumb-{step}-0')
+                for depth, (dim, value) in enumerate(path, start=1):
+                    crumbs[depth].button(f"{dim}: {value}", on_click=drill_up, args=(depth,), key=f'drill-crumb-{step}-{depth}')
+
+                remaining = [dim for dim in DRILL_DIMENSIONS if dim not in dict(path)]
+                if not remaining:
+                    st.info("Every dimension is in the path; go back up to break it down differently.")
+                else:
+                    dim = st.selectbox("Break down by", remaining, key=f'drill-by-{step}')
+                    with stage('drilldown.lookup', depth=len(path)):
+                        total = deltas.total(path, base, target, measure).iloc[0]
+                        changes = deltas.children(path, dim, base, target, measure)
+                    st.metric(f"{measure}, FY{target}", f"{total[f'FY{target}']:,.0f}",
+                              f"{total['Change']:+,.0f} from FY{base}", delta_color="off")
+                    value_format = "%.0f" if measure == 'Count of Event' else "%.1f"
+                    drillable = len(remaining) > 1
+                    event = st.dataframe(
+                        changes, key=f'drill-table-{step}',
+                        on_select="rerun" if drillable else "ignore", selection_mode="single-row",
+                        column_config={
+                            f'FY{base}': st.column_config.NumberColumn(format=value_format),
+                            f'FY{target}': st.column_config.NumberColumn(format=value_format),
+                            'Change': st.column_config.NumberColumn(format=value_format),
+                            'Change %': st.column_config.NumberColumn(format="%.1f%%"),
+                        },
+                    )
+                    if drillable and event.selection.rows:
+                        path.append((dim, changes.index[event.selection.rows[0]]))
+                        st.session_state['drill_step'] = step + 1
+                        st.rerun()
+
+    st.markdown("---")
+
+
+    st.markdown("### Summary Statistics")
+    st.markdown("Statistics of the export rows matching the filters, including the weight seized per event. Counts, means, standard deviations, minima and maxima are exact. Percentiles are exact too for datasets under 200,000 rows; for larger or streamed ones they come from histograms kept per filter combination and are within 1% of the exact values.")
+    stats_section, stats_open = section_container('summary_stats', "Show summary statistics")
+    if stats_open:
+        with stats_section:
+            summary_key = snapshot.summaries.normalize(dict(filter_key))
+            with stage('describe'):
+                summary_stats = snapshot.summaries.rollup(summary_key, summaries.describe)
+                weight_per_event = snapshot.summaries.rollup(summary_key, summaries.weight_per_event_by_drug)
+            summary_stats
+            st.markdown("#### Weight per Event (lbs) by Drug Type")
+            st.dataframe(weight_per_event)
+
+    if sql_engine.available():
+        st.markdown("---")
+
+        st.markdown("### Ad-hoc SQL")
+        st.markdown("Query the cleaned rows (`seizures`) or the aggregate cube (`cube`) with [DuckDB SQL](https://duckdb.org/docs/sql/introduction). Queries run over the whole dataset; the sidebar filters don't apply.")
+        sql_section, sql_open = section_container('sql', "Run a query")
+        if sql_open:
+            with sql_section:
+                example = st.selectbox("Start from", list(sql_engine.EXAMPLE_QUERIES), key='sql_example')
+                sql = st.text_area("SQL", sql_engine.EXAMPLE_QUERIES[example], height=180, key=f'sql-{example}')
+                start = time.perf_counter()
+                try:
+                    with stage('sql'):
+                        result = sql_engine.query(sql)
+                except sql_engine.QueryError as error:
+                    st.error(str(error))
+                else:
+                    st.caption(f"{len(result)} rows in {(time.perf_counter() - start) * 1000:.0f} ms")
+                    st.dataframe(result, hide_index=True)
+
+    st.markdown("---")
+
+    st.markdown("## Conclusion")
+
+    st.markdown("This project successfully conducted an in-depth Exploratory Data Analysis (EDA) on the Nationwide Drug Seizures dataset, uncovering key patterns, trends, and insights. The analysis focused on regional, temporal, and categorical distributions of drug-related events, providing valuable inputs for enforcement and policymaking.")
+
+    st.markdown("### Summary of Key Findings:")
+    st.markdown("1. **Regional Insights**:")
+    st.markdown("   - The **Coastal/Interior Region** consistently recorded the highest number of drug-related events, largely dominated by non-land-based trafficking methods.")
+    st.markdown("   - The **Southwest Border** showed significant land-based activity, highlighting its role in land trafficking.")
+
+    st.markdown("2. **Drug Type Trends**:")
+    st.markdown("   - **Marijuana** emerged as the most frequently seized drug across all regions and time periods.")
+    st.markdown("   - Synthetic drugs like **Methamphetamine** and emerging substances like **Fentanyl** demonstrated fluctuating but growing trends, indicating evolving trafficking dynamics.")
+
+    st.markdown("3. **Temporal Analysis**:")
+    st.markdown("   - Seasonal trends were evident, with peak activity observed in **January** and a decline during the summer months.")
+    st.markdown("   - The consistency of events across most months suggests that trafficking is not limited to specific periods but requires year-round enforcement efforts.")
+
+    st.markdown("4. **Land and Component Contribution**:")
+    st.markdown("   - The **Office of Field Operations** played a dominant role in enforcement activities across all regions, with the **U.S. Border Patrol** contributing significantly at the **Southwest Border**.")
+    st.markdown("   - Regional variations in trafficking modes were clearly highlighted, aiding in understanding the operational challenges faced by different enforcement agencies.")
+
+    st.markdown("---")
+
+    st.markdown("## References")
+
+    st.markdown("1. **Libraries Used**:")
+    st.markdown("   - **Pandas**: For data manipulation and cleaning. Documentation available at [Pandas Documentation](https://pandas.pydata.org/docs/).")
+    st.markdown("   - **Matplotlib/Seaborn**: For data visualization. Documentation available at [Matplotlib Documentation](https://matplotlib.org/stable/contents.html) and [Seaborn Documentation](https://seaborn.pydata.org/).")
+    st.markdown("- **NumPy**: For numerical analysis. Documentation available at [NumPy Documentation](https://numpy.org/doc/).")
+
+    st.markdown("2. **Dataset Source**:")
+    st.markdown("- [Nationwide Drug Seizures Dataset](https://www.cbp.gov/document/stats/nationwide-drug-seizures)")
+    st.markdown("This dataset was used for exploratory data analysis and question-driven insights in this notebook.")
+
+    st.markdown("3. **Large Language Models (LLMs)**:")
+    st.markdown("- **ChatGPT** was used for generating text contributions to the notebook. The prompts used include:")
+    st.markdown("     - \"Web scrape some ideas to show how to start an introduction explaining the purpose of using the Nationwide Drug Seizures dataset.\"")
+    st.markdown("     - \"What are the best practices for a clean structure in a Jupyter Notebook, and how to beautify some parts of it.\"")
+    st.markdown("     - \"Best practices when conducting Exploratory Data Analysis on a .csv dataset.\"")
+
+    st.markdown("4. **Data Science Workflow Reference**:")
+    st.markdown("   - O’Neil, C., & Schutt, R. (2014). *Doing Data Science* (1st ed.). O'Reilly Media.")
+    st.markdown("     The data science workflow mentioned in the assignment was referenced during the project's development.")
+
+    st.markdown("5. **Online Resources**:")
+    st.markdown(
+       "   - **Markdown Syntax Reference**: [GitHub Markdown Documentation](https://docs.github.com/en/get-started/writing-on-github/getting-started-with-writing-and-formatting-on-github/basic-writing-and-formatting-syntax)")
+    st.markdown("     Used to structure and format Markdown sections effectively.")
+    st.markdown("   - **Python.org**: [Python Language Reference](https://docs.python.org/3/)")
+    st.markdown("     Official documentation for Python programming language features used in this project.")
+
+    # Heavy sections still collapsed are aggregated, and static charts drawn,
+    # in the background after the page has been sent, so opening one is
+    # usually a cache hit
+    if not expand_all:
+        prefetch(index, filter_key, data_key, interactive=interactive)
+finally:
+    run_trace = instrumentation.end()
+if run_trace is not None:
+    with st.sidebar.expander("Performance", expanded=True):
+        st.dataframe(run_trace.records(), hide_index=True)
+        st.download_button(
+            "Download trace (Chrome trace JSON)", json.dumps(run_trace.chrome_trace()),
+            file_name='page-trace.json', mime='application/json'
+        )
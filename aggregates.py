@@ -0,0 +1,244 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from anomalies import detect_spikes
+from data_loader import CSV_DTYPES, DATA_FILE, MONTH_ORDER, clean_data, concat_frames
+from geography import area_locations
+from instrumentation import stage
+from summaries import build_summary, merge_summaries
+from timeseries import FISCAL_YEAR_START, monthly_series
+
+
+CUBE_DIMENSIONS = ['FY', 'Month (abbv)', 'Component', 'Region', 'Land Filter', 'Area', 'Drug Type']
+CUBE_MEASURES = ['Count of Event', 'Weight (lbs)']
+
+# Rows per chunk when streaming exports that don't fit in memory; unset
+# means the whole file is loaded and cached as a frame
+STREAM_CHUNKSIZE = int(os.environ.get('DRUG_DATA_CHUNKSIZE', 0)) or None
+
+
+def build_cube(data):
+    # One pass over the raw rows; every chart is a re-aggregation of this.
+    # Weights are summed in float64 so the rollups don't compound float32 error.
+    with stage('build_cube', rows=len(data)):
+        measures = data[CUBE_MEASURES].astype({'Count of Event': 'int64', 'Weight (lbs)': 'float64'})
+        cube = measures.groupby([data[d] for d in CUBE_DIMENSIONS], observed=True).sum()
+        return cube.reset_index()
+
+
+def merge_cubes(cubes):
+    with stage('merge_cubes', parts=len(cubes)):
+        cube = concat_frames(cubes).groupby(CUBE_DIMENSIONS, observed=True)[CUBE_MEASURES].sum()
+        return cube.reset_index()
+
+
+class _Fold:
+    """Running merge of partial tables, folded in as they arrive."""
+
+    def __init__(self, merge, threshold):
+        self.merge = merge
+        self.threshold = threshold
+        self.folded = []
+        self.pending = []
+        self.pending_rows = 0
+
+    def add(self, partial):
+        self.pending.append(partial)
+        self.pending_rows += len(partial)
+        # Fold once the pending partials outgrow the running total, which keeps
+        # the total regrouping work linear even when the total is large
+        if self.pending_rows >= max(self.threshold, sum(len(table) for table in self.folded)):
+            self.folded = [self.merge(self.folded + self.pending)]
+            self.pending = []
+            self.pending_rows = 0
+
+    def result(self):
+        return self.merge(self.folded + self.pending)
+
+
+def _clean_chunks(path, chunksize):
+    for chunk in pd.read_csv(path, dtype=CSV_DTYPES, chunksize=chunksize):
+        yield clean_data(chunk)
+
+
+def stream_aggregates(path=DATA_FILE, chunksize=100_000):
+    """Build ``(cube, summary)`` from a CSV read ``chunksize`` rows at a time.
+
+    Each chunk is cleaned like the in-memory path and folded into the running
+    cube and summary, so peak memory is one chunk plus the aggregates rather
+    than the whole file.
+    """
+    cube = _Fold(merge_cubes, chunksize)
+    summary = _Fold(merge_summaries, chunksize)
+    for chunk in _clean_chunks(path, chunksize):
+        cube.add(build_cube(chunk))
+        summary.add(build_summary(chunk))
+    return cube.result(), summary.result()
+
+
+def rollup(cube, by, measure):
+    return cube.groupby(by, observed=True)[measure].sum()
+
+
+def total_weight_by_drug(cube):
+    return rollup(cube, 'Drug Type', 'Weight (lbs)')
+
+
+def region_drug_weight(cube):
+    return rollup(cube, ['Region', 'Drug Type'], 'Weight (lbs)').unstack()
+
+
+def month_drug_weight(cube):
+    return rollup(cube, ['Month (abbv)', 'Drug Type'], 'Weight (lbs)').unstack().reindex(MONTH_ORDER)
+
+
+def top_drugs_by_region(cube, n=5):
+    top_drugs = total_weight_by_drug(cube).nlargest(n).index
+    return region_drug_weight(cube)[top_drugs]
+
+
+def top_drugs_by_month(cube, n=3):
+    top_drugs = total_weight_by_drug(cube).nlargest(n).index
+    return month_drug_weight(cube)[top_drugs]
+
+
+def drug_share_over_time(cube):
+    # Calendar months in chronological order; FY 2021 starts in October 2020
+    return monthly_series(cube).frame().astype('int64')
+
+
+def _top_event_series(cube, n, exclude):
+    series = monthly_series(cube)
+    # Drop excluded types before ranking, or they fill in when fewer than n remain
+    keep = np.flatnonzero(~series.columns.isin(exclude))
+    totals = series.values[:, keep].sum(axis=0)
+    return series.select(series.columns[keep[np.argsort(-totals, kind='stable')[:n]]])
+
+
+def drug_event_trends(cube, n=5, window=3, exclude=('Other Drugs**',)):
+    """Trailing ``window``-month mean of monthly events for the top ``n`` drug types."""
+    series = _top_event_series(cube, n, exclude)
+    return series.frame(series.rolling_mean(window))
+
+
+def drug_event_yoy(cube, n=5, exclude=('Other Drugs**',)):
+    """Monthly events of the top ``n`` drug types with their change from the previous FY.
+
+    A tidy Month/Drug Type/Events/Change/Change % table of the months that
+    have a previous fiscal year; empty when only one FY is selected.
+    """
+    series = _top_event_series(cube, n, exclude)
+    # The series pads fiscal years missing from the selection with zeros;
+    # compare only selected years with a selected previous year
+    years = series.periods.year + (series.periods.month >= FISCAL_YEAR_START)
+    selected = cube['FY'].unique()
+    compared = np.repeat(np.isin(years, selected) & np.isin(years - 1, selected), len(series.columns))
+    table = pd.DataFrame({
+        'Month': np.repeat(series.periods.to_timestamp(), len(series.columns)),
+        'Drug Type': np.tile(series.columns.astype(str), len(series.periods)),
+        'Events': series.values.ravel().astype('int64'),
+        'Change': series.yoy().ravel(),
+        'Change %': series.yoy_pct().ravel(),
+    })
+    return table[compared & table['Change'].notna().to_numpy()].reset_index(drop=True)
+
+
+def drug_seasonality(cube, n=5, exclude=('Other Drugs**',)):
+    """Seasonal component of monthly events by fiscal month for the top ``n`` drug types."""
+    return _top_event_series(cube, n, exclude).seasonal_profile()
+
+
+def event_spikes(cube, n=5):
+    """Months with unusually many events for their Area and Drug Type.
+
+    Returns ``(spikes, lines, marked)``: every spike ranked by score, the
+    monthly events of the ``n`` series with the strongest spikes (one
+    "Area · Drug Type" column each) and those series' spikes.
+    """
+    detector = detect_spikes(cube)
+    spikes = detector.spikes()
+    top = spikes.drop_duplicates(['Area', 'Drug Type']).head(n)[['Area', 'Drug Type']]
+    labels = [f'{area} · {drug}' for area, drug in top.itertuples(index=False)]
+    positions = detector.columns.get_indexer(pd.MultiIndex.from_frame(top))
+    lines = pd.DataFrame(detector.values[:, positions].astype(np.int64), columns=labels,
+                         index=detector.periods.to_timestamp().rename('Month'))
+    marked = spikes.merge(top.assign(Series=labels))
+    return spikes, lines, marked
+
+
+def yearly_top_drug_events(cube, n=3, exclude=('Other Drugs**',)):
+    """Monthly events of each FY's top ``n`` drug types, plus their peak months.
+
+    Returns ``(top_events, peaks)``: a tidy FY/Month/Drug Type/Count of Event/Rank
+    table, and one row per (FY, Drug Type) with its peak month and event count.
+    Every fiscal year is ranked in the same pass.
+    """
+    events = rollup(cube[~cube['Drug Type'].isin(exclude)], ['FY', 'Month (abbv)', 'Drug Type'], 'Count of Event')
+    events = events.reset_index()
+
+    # Ties keep Drug Type order, as the stable sort they replace did
+    yearly = events.groupby(['FY', 'Drug Type'], observed=True)['Count of Event'].sum()
+    rank = yearly.groupby(level='FY').rank(method='first', ascending=False).astype('int64').rename('Rank')
+    # merge rather than join: joining on index levels leaves FY both a level
+    # and a column when nothing is left to rank
+    top_events = events.merge(rank[rank <= n].reset_index(), on=['FY', 'Drug Type'])
+
+    # First maximum in calendar order, matching idxmax over a JAN-DEC index
+    peaks = (
+        top_events.sort_values(['FY', 'Drug Type', 'Count of Event', 'Month (abbv)'],
+                               ascending=[True, True, False, True])
+        .drop_duplicates(['FY', 'Drug Type'])
+        .rename(columns={'Month (abbv)': 'Peak Month', 'Count of Event': 'Peak Events'})
+        .merge(yearly.rename('Total Events').reset_index(), on=['FY', 'Drug Type'])
+        .sort_values(['FY', 'Rank'])
+        [['FY', 'Rank', 'Drug Type', 'Total Events', 'Peak Month', 'Peak Events']]
+        .reset_index(drop=True)
+    )
+    return top_events.reset_index(drop=True), peaks
+
+
+def yearly_top_drug_pivots(cube, n=3):
+    """Per-FY JAN-DEC pivots of the top drugs' events, with each FY's peak rows."""
+    top_events, peaks = yearly_top_drug_events(cube, n)
+    peaks_by_year = dict(tuple(peaks.groupby('FY')))
+    pivots = {}
+    for year, year_events in top_events.groupby('FY'):
+        monthly_pivot = year_events.pivot_table(
+            index='Month (abbv)', columns='Drug Type', values='Count of Event', fill_value=0, observed=True
+        ).reindex(MONTH_ORDER)
+        pivots[year] = (monthly_pivot, peaks_by_year[year])
+    return pivots, peaks
+
+
+def area_drug_events(cube):
+    return rollup(cube, ['Area', 'Drug Type'], 'Count of Event').reset_index()
+
+
+def top_areas_by_drug(cube, n=10):
+    area_events = area_drug_events(cube)
+    top_areas = area_events.groupby('Area', observed=True)['Count of Event'].sum().nlargest(n).index
+    return area_events[area_events['Area'].isin(top_areas)].pivot_table(
+        index='Area', columns='Drug Type', values='Count of Event', aggfunc='sum', fill_value=0, observed=True
+    )
+
+
+def area_drug_locations(cube):
+    """Events and weight per mapped Area and Drug Type, with each Area's coordinates."""
+    totals = cube.groupby(['Region', 'Area', 'Drug Type'], observed=True)[['Count of Event', 'Weight (lbs)']].sum()
+    totals = totals.reset_index().astype({'Region': str, 'Area': str, 'Drug Type': str})
+    return totals.merge(area_locations(), on='Area')
+
+
+def region_land_filter_events(cube):
+    return rollup(cube, ['Region', 'Land Filter'], 'Count of Event').unstack(fill_value=0)
+
+
+def region_component_events(cube):
+    return rollup(cube, ['Region', 'Component'], 'Count of Event').unstack(fill_value=0)
+
+
+def monthly_events(cube):
+    # Months without events are zero-height bars, not gaps the polar chart can't draw
+    return rollup(cube, 'Month (abbv)', 'Count of Event').reindex(MONTH_ORDER, fill_value=0)
@@ -0,0 +1,134 @@
+"""Spike detection over the monthly Area x Drug Type event series.
+
+Every (Area, Drug Type, month) cell is scored against its own trailing
+baseline: the median of the series' previous ``window`` months, with the
+median absolute deviation as the spread. All series are held in one dense
+months x series array (see timeseries.py) and scored in a single pass, so
+thousands of Area x Drug Type series cost a few array operations rather
+than a loop per area. A new month only needs the last ``window`` months of
+history, so ``SpikeDetector.append`` scores it without rescoring the past.
+
+    from anomalies import detect_spikes
+    detector = detect_spikes(cube)
+    detector.spikes().head(20)
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from timeseries import monthly_series
+
+
+WINDOW = 12
+THRESHOLD = 3.5
+MIN_EVENTS = 5
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+def _baseline(history):
+    """Median and spread of ``history`` (... x window) along its last axis.
+
+    The spread is the scaled MAD, but never below the square root of the
+    median (the Poisson spread of a count) or one event, so flat or mostly
+    empty histories don't turn a handful of events into a huge score.
+    """
+    median = np.median(history, axis=-1)
+    mad = np.median(np.abs(history - median[..., None]), axis=-1)
+    return median, np.maximum(MAD_SCALE * mad, np.sqrt(np.maximum(median, 1)))
+
+
+def robust_scores(values, window=WINDOW):
+    """Trailing baselines and robust z-scores of a months x series array.
+
+    Returns ``(baseline, scores)`` shaped like ``values``; the first
+    ``window`` months have no history and are NaN.
+    """
+    baseline = np.full(values.shape, np.nan)
+    scores = np.full(values.shape, np.nan)
+    if len(values) > window:
+        # history[t] holds months t .. t + window - 1, the baseline of month t + window
+        history = sliding_window_view(values, window, axis=0)[:-1]
+        median, spread = _baseline(history)
+        baseline[window:] = median
+        scores[window:] = (values[window:] - median) / spread
+    return baseline, scores
+
+
+class SpikeDetector:
+    """Scores of every month of a set of monthly series, extendable a month at a time.
+
+    ``columns`` labels the series (an (Area, Drug Type) MultiIndex for
+    ``detect_spikes``). A month is a spike when its score reaches
+    ``threshold`` and it has at least ``min_events`` events.
+    """
+
+    def __init__(self, periods, columns, values, window=WINDOW, threshold=THRESHOLD, min_events=MIN_EVENTS):
+        self.periods = periods
+        self.columns = columns
+        self.values = values
+        self.window = window
+        self.threshold = threshold
+        self.min_events = min_events
+        self.baseline, self.scores = robust_scores(values, window)
+
+    def flags(self):
+        """Boolean months x series array of the cells that are spikes."""
+        with np.errstate(invalid='ignore'):
+            return (self.scores >= self.threshold) & (self.values >= self.min_events)
+
+    def append(self, period, counts):
+        """Add and score the month after the last one.
+
+        ``counts`` maps series labels to the month's events (a Series
+        indexed like ``columns``); missing series had none, and labels not
+        seen before start a new series with an empty history. Returns the
+        month's scores, one per series.
+        """
+        period = pd.Period(period, freq='M')
+        if len(self.periods) and period != self.periods[-1] + 1:
+            raise ValueError(f"expected {self.periods[-1] + 1}, got {period}")
+        new = counts.index.difference(self.columns)
+        if len(new):
+            self.columns = self.columns.append(new)
+            padding = np.zeros((len(self.values), len(new)))
+            self.values = np.hstack([self.values, padding])
+            self.baseline = np.hstack([self.baseline, padding + np.nan])
+            self.scores = np.hstack([self.scores, padding + np.nan])
+        row = counts.reindex(self.columns, fill_value=0).to_numpy(dtype=np.float64)
+        baseline = np.full(len(self.columns), np.nan)
+        scores = np.full(len(self.columns), np.nan)
+        if len(self.values) >= self.window:
+            baseline, spread = _baseline(self.values[-self.window:].T)
+            scores = (row - baseline) / spread
+        self.periods = self.periods.append(pd.PeriodIndex([period]))
+        self.values = np.vstack([self.values, row])
+        self.baseline = np.vstack([self.baseline, baseline])
+        self.scores = np.vstack([self.scores, scores])
+        return pd.Series(scores, index=self.columns, name=str(period))
+
+    def spikes(self):
+        """Every spike as a table ranked by score, highest first."""
+        months, series = np.nonzero(self.flags())
+        order = np.lexsort((months, -self.scores[months, series]))
+        months, series = months[order], series[order]
+        table = self.columns[series].to_frame(index=False)
+        table['Month'] = self.periods[months].to_timestamp()
+        table['Events'] = self.values[months, series].astype(np.int64)
+        table['Baseline'] = self.baseline[months, series]
+        table['Score'] = self.scores[months, series].round(2)
+        return table
+
+
+def detect_spikes(cube, by=('Area', 'Drug Type'), **options):
+    """A ``SpikeDetector`` over the cube's monthly events per ``by`` combination.
+
+    ``monthly_series`` pads the last fiscal year to September; those
+    not-yet-reported months are dropped so the next export's months can be
+    appended.
+    """
+    series = monthly_series(cube, by=list(by))
+    reported = np.flatnonzero(series.values.any(axis=1))
+    end = reported[-1] + 1 if len(reported) else 0
+    return SpikeDetector(series.periods[:end], series.columns, series.values[:end], **options)
@@ -0,0 +1,13 @@
+"""The page and the export API in one server process.
+
+Both read the same shared store, so API requests reuse the rollups the
+page has already computed and the reverse.
+
+    streamlit run app.py
+"""
+import streamlit as st
+
+import export_api
+
+
+app = st.App('Drug_Data_Analysis_Streamlit.py', routes=export_api.routes())
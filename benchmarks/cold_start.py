@@ -0,0 +1,74 @@
+"""Measure cold-start time of the page in fresh interpreter processes.
+
+Three timings per run, each in a new process:
+  import  - importing the page's own modules (plotting libraries included if they load eagerly)
+  cold    - from interpreter start to the end of the first page run
+  warmed  - the first page run after warmup.warm(), as a warmed server sees it
+
+    python benchmarks/cold_start.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT = """
+import time
+start = time.perf_counter()
+import aggregates, catalog, data_loader, filters, render_cache, sections, store
+print(time.perf_counter() - start)
+"""
+
+PAGE = """
+import time
+start = time.perf_counter()
+{warm}
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout=600)
+app.session_state['chart_backend'] = {backend!r}
+page_start = time.perf_counter()
+app.run()
+assert not app.exception, app.exception[0].value
+print(time.perf_counter() - ({since}))
+"""
+
+
+def timed(code):
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--backend', default='Interactive', choices=['Interactive', 'Static images'])
+    args = parser.parse_args()
+
+    script = os.path.join(ROOT, 'Drug_Data_Analysis_Streamlit.py')
+    has_warmup = os.path.exists(os.path.join(ROOT, 'warmup.py'))
+    codes = {
+        'import': IMPORT,
+        'cold': PAGE.format(warm='', script=script, backend=args.backend, since='start'),
+    }
+    if has_warmup:
+        codes['warmed'] = PAGE.format(warm='import warmup; warmup.warm()', script=script, backend=args.backend,
+                                      since='page_start')
+    # Fill the on-disk caches first so every run measures the same thing
+    timed(codes['cold'])
+
+    results = {}
+    for name, code in codes.items():
+        samples = [timed(code) for _ in range(args.runs)]
+        results[name] = {'median_seconds': round(statistics.median(samples), 3),
+                         'min_seconds': round(min(samples), 3)}
+        print(f"{name:7s} median {statistics.median(samples):.3f}s min {min(samples):.3f}s", file=sys.stderr)
+    json.dump({'backend': args.backend, 'runs': args.runs, 'results': results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
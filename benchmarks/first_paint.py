@@ -0,0 +1,122 @@
+"""Compare time to first paint with lazy sections against computing every section.
+
+Each measurement runs the page once in a fresh process, after the exports have
+been ingested, so the timings cover aggregation and rendering only, for each
+chart backend. Server CPU time is reported next to wall time. The lazy run
+also reports when the background prefetch of the heavy sections finished.
+With --scale the bundled export is enlarged synthetically: every row is copied
+``scale`` times under distinct Area names, so the cube grows with it.
+
+    python benchmarks/first_paint.py --scale 1 100 --backend Interactive
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCRIPT = os.path.join(ROOT, 'Drug_Data_Analysis_Streamlit.py')
+
+BACKENDS = ['Interactive', 'Static images']
+
+
+def enlarge(path, scale, directory):
+    import pandas as pd
+
+    data = pd.read_csv(path)
+    area = data['Area of Responsibility']
+    copies = [data.assign(**{'Area of Responsibility': area + f' #{copy}'}) for copy in range(scale)]
+    output = os.path.join(directory, f'nationwide-drugs-x{scale}.csv')
+    pd.concat(copies, ignore_index=True).to_csv(output, index=False)
+    return output
+
+
+def measure(mode, backend):
+    from streamlit.testing.v1 import AppTest
+
+    from render_cache import render_cache, render_key
+    from sections import SECTIONS
+    from store import store
+
+    start = time.perf_counter()
+    snapshot = store.current()
+    index = snapshot.index
+    ingest = time.perf_counter() - start
+
+    app = AppTest.from_file(SCRIPT, default_timeout=3600)
+    app.session_state['expand_all'] = mode == 'eager'
+    app.session_state['chart_backend'] = backend
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    app.run()
+    first_paint = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    if app.exception:
+        sys.exit(f"{mode} run raised: {app.exception[0].value}")
+
+    result = {'mode': mode, 'backend': backend, 'cube_rows': len(index.cube), 'ingest_seconds': round(ingest, 3),
+              'first_paint_seconds': round(first_paint, 3), 'cpu_seconds': round(cpu, 3)}
+    if mode == 'lazy':
+        data_key = snapshot.key
+        keys = [
+            render_key(chart_id, (), data_key)
+            for section in SECTIONS
+            if section.heavy and (backend != 'Interactive' or section.spec is None)
+            for chart_id, _, _, _ in section.chart_jobs(index.rollup((), section.rollup))
+        ]
+        while not all(key in render_cache for key in keys):
+            time.sleep(0.05)
+        result['prefetch_done_seconds'] = round(time.perf_counter() - start, 3)
+    print(json.dumps(result))
+
+
+def run(mode, backend, directory):
+    env = dict(os.environ, DRUG_DATA_DIR=directory)
+    output = subprocess.run([sys.executable, __file__, '--measure', mode, '--backend', backend], env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, nargs='*', default=[1, 100])
+    parser.add_argument('--backend', nargs='*', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--measure', choices=['lazy', 'eager'], help=argparse.SUPPRESS)
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.backend[0])
+        return
+
+    from data_loader import DATA_FILE
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scale:
+            data_dir = ROOT if scale == 1 else os.path.join(directory, f'x{scale}')
+            if scale != 1:
+                os.makedirs(data_dir)
+                enlarge(DATA_FILE, scale, data_dir)
+            for backend in args.backend:
+                lazy = run('lazy', backend, data_dir)
+                eager = run('eager', backend, data_dir)
+                speedup = eager['first_paint_seconds'] / lazy['first_paint_seconds']
+                print(f"x{scale} {backend}: cube {lazy['cube_rows']} rows, "
+                      f"first paint {lazy['first_paint_seconds']:.2f}s lazy vs {eager['first_paint_seconds']:.2f}s eager "
+                      f"({speedup:.1f}x), full page CPU {eager['cpu_seconds']:.2f}s, "
+                      f"heavy sections prefetched after {lazy['prefetch_done_seconds']:.2f}s")
+                results.append({'scale': scale, 'backend': backend, 'lazy': lazy, 'eager': eager})
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
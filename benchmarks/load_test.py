@@ -0,0 +1,211 @@
+"""Load-test the page with concurrent sessions against a real Streamlit server.
+
+Starts `streamlit run` on a free port and connects --sessions websocket
+clients at once, each speaking the protocol the browser uses (protobuf
+BackMsg/ForwardMsg). A session loads the page, then makes --interactions
+random changes (picking a sidebar filter value or opening a section),
+each a full rerun. Latency is the time from sending a rerun to the
+server's script_finished message. The server's resident memory is read
+with one warm-up session connected and again with every session
+connected; the growth divided by the sessions is what each session costs
+on top of the shared store.
+
+    python benchmarks/load_test.py --sessions 50 --interactions 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+SCRIPT = os.path.join(ROOT, 'Drug_Data_Analysis_Streamlit.py')
+
+BACKENDS = ['Interactive', 'Static images']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def resident_bytes(pid):
+    with open(f'/proc/{pid}/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def start_server(port, timeout=60):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', SCRIPT, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health') as response:
+                if response.read() == b'ok':
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f"server didn't start on port {port} within {timeout}s")
+
+
+class Session:
+    """One browser tab: the widget states it sends and the widgets it has seen."""
+
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}
+        self.filters = {}
+        self.sections = {}
+        self.radios = {}
+        self.exceptions = 0
+        self.connection = None
+
+    async def connect(self):
+        self.connection = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+
+    async def close(self):
+        await self.connection.close()
+
+    def _collect(self, message):
+        if message.WhichOneof('type') != 'delta':
+            return
+        delta = message.delta
+        if delta.WhichOneof('type') == 'new_element':
+            element = delta.new_element
+            kind = element.WhichOneof('type')
+            if kind == 'multiselect':
+                self.filters[element.multiselect.label] = (element.multiselect.id, list(element.multiselect.options))
+            elif kind == 'radio':
+                self.radios[element.radio.label] = (element.radio.id, list(element.radio.options))
+            elif kind == 'exception':
+                self.exceptions += 1
+        elif delta.WhichOneof('type') == 'add_block' and delta.add_block.WhichOneof('type') == 'expandable':
+            widget_id = delta.add_block.expandable.id
+            if '-section-' in widget_id:
+                self.sections[widget_id.rsplit('-section-', 1)[1]] = widget_id
+
+    async def rerun(self):
+        """Rerun the page with the current widget states; return the seconds it took."""
+        request = BackMsg()
+        request.rerun_script.widget_states.widgets.extend(self.widgets.values())
+        start = time.perf_counter()
+        await self.connection.send(request.SerializeToString())
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await self.connection.recv())
+            self._collect(message)
+            if message.WhichOneof('type') == 'script_finished':
+                return time.perf_counter() - start
+
+    def pick_filter(self, rng):
+        label = rng.choice(sorted(self.filters))
+        widget_id, options = self.filters[label]
+        state = WidgetState(id=widget_id)
+        state.string_array_value.data.append(rng.choice(options))
+        self.widgets[widget_id] = state
+
+    def open_section(self, rng):
+        widget_id = self.sections[rng.choice(sorted(self.sections))]
+        self.widgets[widget_id] = WidgetState(id=widget_id, bool_value=True)
+
+    def choose(self, label, option):
+        widget_id, options = self.radios[label]
+        self.widgets[widget_id] = WidgetState(id=widget_id, int_value=options.index(option))
+
+
+async def simulate(session, rng, interactions, backend):
+    """Load the page and interact with it; return the timed rerun latencies."""
+    await session.connect()
+    latencies = [await session.rerun()]
+    if backend != BACKENDS[0]:
+        session.choose('Charts', backend)
+        await session.rerun()
+    for _ in range(interactions):
+        if rng.random() < 0.5:
+            session.pick_filter(rng)
+        else:
+            session.open_section(rng)
+        latencies.append(await session.rerun())
+    return latencies
+
+
+async def load_test(url, pid, sessions, interactions, backend, seed):
+    warm = Session(url)
+    await simulate(warm, random.Random(seed), 0, backend)
+    baseline = resident_bytes(pid)
+
+    clients = [Session(url) for _ in range(sessions)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        simulate(client, random.Random(seed * 1000 + number), interactions, backend)
+        for number, client in enumerate(clients)
+    ])
+    elapsed = time.perf_counter() - start
+    grown = resident_bytes(pid) - baseline
+    for client in [warm, *clients]:
+        await client.close()
+
+    latencies = np.array([seconds for session_latencies in results for seconds in session_latencies])
+    return {
+        'sessions': sessions,
+        'interactions': interactions,
+        'backend': backend,
+        'reruns': len(latencies),
+        'exceptions': sum(client.exceptions for client in clients),
+        'wall_seconds': round(elapsed, 3),
+        'latency_p50_seconds': round(float(np.percentile(latencies, 50)), 3),
+        'latency_p95_seconds': round(float(np.percentile(latencies, 95)), 3),
+        'latency_max_seconds': round(float(latencies.max()), 3),
+        'server_baseline_bytes': baseline,
+        'server_growth_bytes': grown,
+        'bytes_per_session': grown // sessions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--interactions', type=int, default=3, help='reruns per session after the first load')
+    parser.add_argument('--backend', choices=BACKENDS, default=BACKENDS[0])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port)
+    try:
+        report = asyncio.run(load_test(f'ws://127.0.0.1:{port}/_stcore/stream', server.pid, args.sessions,
+                                       args.interactions, args.backend, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{report['sessions']} sessions, {report['reruns']} reruns ({report['exceptions']} exceptions): "
+          f"p50 {report['latency_p50_seconds']:.2f}s p95 {report['latency_p95_seconds']:.2f}s "
+          f"max {report['latency_max_seconds']:.2f}s; server {report['server_baseline_bytes'] / 1e6:.0f} MB "
+          f"+ {report['bytes_per_session'] / 1e6:.2f} MB per session", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
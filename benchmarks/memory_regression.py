@@ -0,0 +1,76 @@
+"""Run the Streamlit page repeatedly and check that memory stays flat.
+
+Every section is expanded with the static chart backend and the render
+cache is cleared before every run, so each run draws every figure again. After a warm-up, the resident set size and pyplot's open
+figure count must not grow across runs.
+
+    python benchmarks/memory_regression.py --runs 20
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matplotlib.pyplot as plt
+from streamlit.testing.v1 import AppTest
+
+from render_cache import render_cache
+
+
+SCRIPT = os.path.join(ROOT, 'Drug_Data_Analysis_Streamlit.py')
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # Peak rather than current RSS, but still catches unbounded growth
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 2 ** 20 if sys.platform == 'darwin' else usage / 2 ** 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--max-growth-mb', type=float, default=25.0)
+    args = parser.parse_args()
+
+    app = AppTest.from_file(SCRIPT, default_timeout=600)
+    app.session_state['expand_all'] = True
+    app.session_state['chart_backend'] = 'Static images'
+    samples = []
+    for run in range(args.warmup + args.runs):
+        render_cache.clear()
+        app.run()
+        if app.exception:
+            sys.exit(f"run {run} raised: {app.exception[0].value}")
+        gc.collect()
+        if run >= args.warmup:
+            samples.append((rss_mb(), len(plt.get_fignums())))
+
+    first_rss, _ = samples[0]
+    last_rss, _ = samples[-1]
+    open_figures = max(count for _, count in samples)
+    growth = last_rss - first_rss
+    print(f"runs={args.runs} rss_first={first_rss:.1f}MB rss_last={last_rss:.1f}MB "
+          f"growth={growth:.1f}MB open_figures={open_figures}")
+
+    failures = []
+    if open_figures:
+        failures.append(f"{open_figures} pyplot figures left open")
+    if growth > args.max_growth_mb:
+        failures.append(f"RSS grew {growth:.1f}MB over {args.runs} runs")
+    if failures:
+        sys.exit('FAIL: ' + '; '.join(failures))
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
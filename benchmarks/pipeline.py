@@ -0,0 +1,143 @@
+"""Time each stage of the analysis pipeline on synthetic exports of growing size.
+
+For every size a synthetic export is generated (see synthetic.py), then
+loading, cleaning, building the aggregate cube, every section's rollup and
+every chart (matplotlib render and Vega-Lite spec) are timed separately, as
+are loading the rows into DuckDB and the example SQL queries when DuckDB is
+installed. Each stage keeps its best time over --repeat runs. Results are written as JSON;
+pass a previous run's file to --compare to flag stages that got slower.
+
+    python benchmarks/pipeline.py --rows 10000 1000000 10000000 --output bench.json
+    python benchmarks/pipeline.py --rows 10000 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from aggregates import build_cube
+from data_loader import CSV_DTYPES, clean_data
+from render_cache import render_figure
+from sections import SECTIONS
+import sql_engine
+from synthetic import write_csv
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def run_pipeline(path, repeat=3):
+    stages = {}
+    raw, stages['load'] = best_of(repeat, lambda: pd.read_csv(path, dtype=CSV_DTYPES))
+    # clean_data replaces columns on a renamed copy, so the raw frame can be reused
+    data, stages['clean'] = best_of(repeat, lambda: clean_data(raw))
+    cube, stages['build_cube'] = best_of(repeat, lambda: build_cube(data))
+    for section in SECTIONS:
+        result, stages[f'aggregate.{section.section_id}'] = best_of(repeat, lambda: section.rollup(cube))
+        for chart_id, _, draw, args in section.chart_jobs(result):
+            _, stages[f'render.{chart_id}'] = best_of(repeat, lambda: render_figure(draw, *args))
+            if section.spec is not None:
+                _, stages[f'spec.{chart_id}'] = best_of(repeat, lambda: section.spec(*args))
+    if sql_engine.available():
+        connection, stages['sql.load'] = best_of(repeat, lambda: sql_engine.connect({'seizures': data, 'cube': cube}))
+        for name, sql in sql_engine.EXAMPLE_QUERIES.items():
+            slug = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+            _, stages[f'sql.{slug}'] = best_of(repeat, lambda: connection.cursor().execute(sql).df())
+    return {'rows': len(data), 'cube_rows': len(cube), 'stages': {name: round(s, 6) for name, s in stages.items()}}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print stages slower than ``baseline`` by more than ``threshold``; return how many."""
+    previous = {entry['rows']: entry['stages'] for entry in baseline['results']}
+    regressions = 0
+    for entry in results:
+        for name, seconds in entry['stages'].items():
+            before = previous.get(entry['rows'], {}).get(name)
+            if before and seconds > before * (1 + threshold):
+                regressions += 1
+                print(f"SLOWER {entry['rows']} rows {name}: {before:.4f}s -> {seconds:.4f}s "
+                      f"({seconds / before:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='*', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative slowdown reported as a regression (default 0.25)')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f'nationwide-drugs-{rows}.csv')
+            start = time.perf_counter()
+            write_csv(rows, path, seed=args.seed)
+            generated = time.perf_counter() - start
+            result = run_pipeline(path, args.repeat)
+            result['generate_seconds'] = round(generated, 3)
+            os.remove(path)
+            results.append(result)
+            stages = result['stages']
+            print(f"{rows} rows: load {stages['load']:.3f}s clean {stages['clean']:.3f}s "
+                  f"cube {stages['build_cube']:.3f}s "
+                  f"aggregates {sum(s for n, s in stages.items() if n.startswith('aggregate.')):.3f}s "
+                  f"renders {sum(s for n, s in stages.items() if n.startswith('render.')):.3f}s",
+                  file=sys.stderr)
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'seed': args.seed, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            if compare(results, json.load(baseline), args.threshold):
+                raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
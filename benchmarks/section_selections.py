@@ -0,0 +1,68 @@
+"""Check that every section handles every single-value filter selection.
+
+Selecting one value of a dimension can leave a section with nothing to
+show, e.g. Drug Type = Other Drugs** for the yearly top drugs, which leave
+that drug type out. For each such selection this computes every section's
+rollup, its export table and its chart specs, and reports what raises.
+
+    python benchmarks/section_selections.py [--draw]
+"""
+import argparse
+import os
+import sys
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filters import FILTER_DIMENSIONS
+from sections import SECTIONS
+from store import store
+
+
+def selections(index):
+    yield {}
+    for dim in FILTER_DIMENSIONS:
+        for value in index.options[dim]:
+            yield {dim: [value]}
+
+
+def check(section, index, selection, draw):
+    result = index.rollup(index.normalize(selection), section.rollup)
+    section.table(result)
+    for _, _, draw_chart, args in section.chart_jobs(result):
+        if section.spec is not None:
+            section.spec(*args)
+        if draw:
+            draw_chart(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--draw', action='store_true', help='also draw the static charts')
+    args = parser.parse_args()
+    if args.draw:
+        import matplotlib
+        import matplotlib.pyplot as plt
+
+        matplotlib.use('Agg')
+
+    index = store.current().index
+    failures = []
+    checked = 0
+    for selection in selections(index):
+        for section in SECTIONS:
+            checked += 1
+            try:
+                check(section, index, selection, args.draw)
+            except Exception as error:
+                failures.append(f"{section.section_id} {selection}: {error!r}")
+                traceback.print_exc()
+            if args.draw:
+                plt.close('all')
+    if failures:
+        sys.exit('FAIL:\n' + '\n'.join(failures))
+    print(f"OK: {checked} section/selection pairs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Check that ad-hoc SQL can't modify the shared tables.
+
+Runs statements that write (DML, DDL, EXPLAIN ANALYZE, CTE-prefixed DML)
+through the engine, expects each to be refused, and then checks that the
+tables and their row counts are unchanged. Also checks that the result
+cache keeps queries apart that differ only in string or alias case.
+
+    python benchmarks/sql_readonly.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sql_engine import QueryError, engine, normalize_sql
+from store import store
+
+WRITES = [
+    'DELETE FROM cube',
+    'INSERT INTO cube SELECT * FROM cube',
+    'UPDATE cube SET "Count of Event" = 0',
+    'CREATE TABLE t AS SELECT 1',
+    'DROP TABLE cube',
+    'PIVOT cube ON Component',
+    'EXPLAIN ANALYZE DELETE FROM cube',
+    'explain analyze create table t as select 1',
+    'WITH x AS (SELECT 1) DELETE FROM cube',
+    'with x as (select 1) insert into cube select * from cube',
+    'SELECT 1; DELETE FROM cube',
+]
+
+READS = [
+    'SELECT count(*) FROM cube',
+    'WITH x AS (SELECT * FROM cube) SELECT count(*) FROM x',
+    'FROM cube LIMIT 1',
+    'SUMMARIZE cube',
+    'DESCRIBE cube',
+    'SHOW TABLES',
+]
+
+
+def main():
+    expected_rows = len(store.current().cube)
+    tables = engine.tables()
+    failures = []
+    for sql in WRITES:
+        try:
+            engine.query(sql)
+        except QueryError:
+            continue
+        failures.append(f"not refused: {sql}")
+    for sql in READS:
+        try:
+            engine.query(sql)
+        except QueryError as error:
+            failures.append(f"refused: {sql} ({error})")
+    rows = int(engine.query('SELECT count(*) AS rows FROM cube')['rows'].iloc[0])
+    if rows != expected_rows:
+        failures.append(f"cube has {rows} rows, expected {expected_rows}")
+    if engine.tables() != tables:
+        failures.append(f"tables changed from {tables} to {engine.tables()}")
+    if normalize_sql('SELECT $$Ab$$') == normalize_sql('SELECT $$ab$$'):
+        failures.append("dollar-quoted strings differing in case normalize alike")
+    # Result columns are named after aliases as written, so the cache must keep their case
+    for alias in ('Total', 'total'):
+        columns = list(engine.query(f'SELECT count(*) AS {alias} FROM cube').columns)
+        if columns != [alias]:
+            failures.append(f"AS {alias} returned columns {columns}")
+    if failures:
+        sys.exit('FAIL: ' + '; '.join(failures))
+    print(f"OK: {len(WRITES)} writing statements refused, {len(READS)} reads allowed, tables unchanged")
+
+
+if __name__ == '__main__':
+    main()
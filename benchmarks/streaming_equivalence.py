@@ -0,0 +1,76 @@
+"""Check that the streamed cube and summary equal the in-memory ones, and compare peak memory.
+
+    python benchmarks/streaming_equivalence.py --chunksize 1000 [CSV]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import CUBE_DIMENSIONS, build_cube, stream_aggregates
+from data_loader import DATA_FILE, read_data
+from summaries import SUMMARY_DIMENSIONS, build_summary
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tables = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tables, elapsed, peak / 2 ** 20
+
+
+def in_memory_tables(path):
+    data = read_data(path)
+    return build_cube(data), build_summary(data)
+
+
+def differences(name, in_memory, streamed, keys, exact, summed):
+    in_memory = in_memory.sort_values(keys).reset_index(drop=True)
+    streamed = streamed.sort_values(keys).reset_index(drop=True)
+    if len(in_memory) != len(streamed):
+        return [f"{len(in_memory)} {name} rows in memory, {len(streamed)} streamed"]
+    failures = []
+    for column in keys:
+        if in_memory[column].dtype != streamed[column].dtype or not in_memory[column].equals(streamed[column]):
+            failures.append(f"{name} {column} differs")
+    for column in exact:
+        if not in_memory[column].equals(streamed[column]):
+            failures.append(f"{name} {column} differs")
+    # Chunked float sums only differ by summation order
+    for column in summed:
+        if not np.allclose(in_memory[column], streamed[column], rtol=1e-9, atol=1e-6):
+            failures.append(f"{name} {column} differs")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=DATA_FILE)
+    parser.add_argument('--chunksize', type=int, default=1000)
+    args = parser.parse_args()
+
+    (cube, summary), memory_time, memory_peak = measure(lambda: in_memory_tables(args.path))
+    (streamed_cube, streamed_summary), stream_time, stream_peak = measure(
+        lambda: stream_aggregates(args.path, args.chunksize)
+    )
+    print(f"in-memory: {memory_time:.2f}s peak {memory_peak:.1f}MB")
+    print(f"streamed:  {stream_time:.2f}s peak {stream_peak:.1f}MB (chunksize {args.chunksize})")
+
+    failures = differences('cube', cube, streamed_cube, CUBE_DIMENSIONS, ['Count of Event'], ['Weight (lbs)'])
+    failures += differences('summary', summary, streamed_summary, SUMMARY_DIMENSIONS + ['Measure', 'Bin'],
+                            ['Rows', 'Min', 'Max'], ['Sum', 'SumSq'])
+    if failures:
+        sys.exit('FAIL: ' + '; '.join(failures))
+    print('OK: streamed cube and summary equal the in-memory ones')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Time summary statistics from the summary table against describe() over the rows.
+
+For each size, synthetic rows are summarized once (the ingest cost). Then
+every filter selection is answered both ways: from the filtered summary
+table and with describe() over the matching rows. The script reports the
+times and the largest relative error of the summary's percentiles.
+
+    python benchmarks/summary_stats.py --rows 10000 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from data_loader import CSV_DTYPES, clean_data
+from filters import CubeIndex
+from summaries import SUMMARY_DIMENSIONS, build_summary, describe
+from synthetic import generate
+
+SELECTIONS = {
+    'all': {},
+    'region': {'Region': ['Southwest Border']},
+    'region_fy_drug': {'Region': ['Southwest Border'], 'FY': [2023], 'Drug Type': ['Methamphetamine']},
+}
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def exact_describe(rows):
+    values = rows[['Count of Event', 'Weight (lbs)']].astype('float64')
+    values['Weight per Event'] = values['Weight (lbs)'] / values['Count of Event']
+    return values.describe()
+
+
+def run(rows, seed, repeat):
+    data = clean_data(generate(rows, seed=seed).astype(CSV_DTYPES))
+    summary, build_time = best_of(1, lambda: build_summary(data))
+    index = CubeIndex(summary, SUMMARY_DIMENSIONS)
+    result = {'rows': rows, 'summary_rows': len(summary), 'build_seconds': round(build_time, 4)}
+    for name, selection in SELECTIONS.items():
+        key = index.normalize(selection)
+        # Both sides pay for the filter: the summary path selects index rows,
+        # describe() masks the data rows
+        approximate, sketch_time = best_of(repeat, lambda: describe(index.view(key) if key else summary))
+        mask = np.ones(len(data), dtype=bool)
+        for dim, values in key:
+            mask &= data[dim].isin(values).to_numpy()
+        exact, exact_time = best_of(repeat, lambda: exact_describe(data[mask]))
+        percentiles = ['25%', '50%', '75%']
+        error = (approximate.loc[percentiles] - exact.loc[percentiles]).abs() / exact.loc[percentiles].abs()
+        result[name] = {
+            'summary_seconds': round(sketch_time, 4),
+            'describe_seconds': round(exact_time, 4),
+            'max_relative_error': round(float(error.replace(np.inf, np.nan).max().max()), 5),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='*', default=[10_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps([run(rows, args.seed, args.repeat) for rows in args.rows], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Generate synthetic seizure exports with the bundled export's schema.
+
+Rows are bootstrapped from the real export, so the categorical
+cardinalities and the joint distribution of Area, Component, Region, Land
+Filter and Drug Type match it. Fiscal year and month are redrawn uniformly,
+and quantities are jittered so repeated rows don't collapse into exact
+duplicates.
+
+    python benchmarks/synthetic.py 1000000 /tmp/nationwide-drugs-1m.csv
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import DATA_FILE, MONTH_ORDER
+
+
+def generate(rows, seed=0, source=DATA_FILE):
+    """Return ``rows`` synthetic export rows as a frame with the CSV's columns."""
+    rng = np.random.default_rng(seed)
+    real = pd.read_csv(source)
+    sample = real.iloc[rng.integers(0, len(real), rows)].reset_index(drop=True)
+    years = np.sort(real['FY'].unique())
+    sample['FY'] = rng.choice(years, rows)
+    sample['Month (abbv)'] = np.asarray(MONTH_ORDER)[rng.integers(0, len(MONTH_ORDER), rows)]
+    sample['Sum Qty (lbs)'] = sample['Sum Qty (lbs)'] * rng.lognormal(0, 0.25, rows)
+    return sample[real.columns]
+
+
+def write_csv(rows, path, seed=0, chunksize=1_000_000):
+    """Write ``rows`` synthetic rows to ``path`` a chunk at a time; return the path."""
+    with open(path, 'w', newline='') as output:
+        for start in range(0, rows, chunksize):
+            chunk = generate(min(chunksize, rows - start), seed=seed + start)
+            chunk.to_csv(output, index=False, header=start == 0)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_csv(args.rows, args.path, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import glob
+import hashlib
+import os
+import threading
+
+import data_loader
+from aggregates import STREAM_CHUNKSIZE, build_cube, merge_cubes, stream_aggregates
+from data_loader import concat_frames, fingerprint, read_cache, write_cache
+from instrumentation import stage
+from summaries import build_summary, merge_summaries
+
+
+DATA_DIR = os.environ.get('DRUG_DATA_DIR', os.path.dirname(data_loader.DATA_FILE))
+DATA_PATTERN = os.environ.get('DRUG_DATA_PATTERN', 'nationwide-drugs-*.csv')
+
+CUBE_SUFFIX = '.cube.feather'
+SUMMARY_SUFFIX = '.summary.feather'
+
+
+def _months(cube):
+    """The (FY, month) pairs a cube has events in."""
+    months = cube[['FY', 'Month (abbv)']].drop_duplicates()
+    return set(zip(months['FY'].tolist(), months['Month (abbv)'].astype(str).tolist()))
+
+
+class DatasetCatalog:
+    """The set of export files in a directory and their merged aggregate cube
+    and summary table (see summaries.py).
+
+    Each export contributes its own cube and summary, cached on disk next to
+    it. A refresh only ingests files that are new or changed since the last
+    one and merges them into the existing totals, so a new monthly drop never
+    re-reads the history. Exports must cover disjoint months: one that
+    repeats a month already loaded is left out and listed in ``rejected``
+    with the reason, instead of being counted twice.
+    """
+
+    def __init__(self, directory=DATA_DIR, pattern=DATA_PATTERN, chunksize=STREAM_CHUNKSIZE):
+        self.directory = directory
+        self.pattern = pattern
+        self.chunksize = chunksize
+        self.files = {}
+        # Exports left out for repeating loaded months: path -> (fingerprint, reason)
+        self.rejected = {}
+        self.cube = None
+        self.summary = None
+        self.key = None
+        # Incremented on every change, so snapshots can be ordered
+        self.version = 0
+        self._data = None
+        self._lock = threading.Lock()
+
+    def paths(self):
+        return sorted(glob.glob(os.path.join(self.directory, self.pattern)))
+
+    def _ingest(self, path, key):
+        with stage('ingest', path=os.path.basename(path)):
+            cube = read_cache(path, key, CUBE_SUFFIX)
+            summary = read_cache(path, key, SUMMARY_SUFFIX)
+            if cube is None or summary is None:
+                if self.chunksize:
+                    cube, summary = stream_aggregates(path, self.chunksize)
+                else:
+                    data = data_loader.load_data(path)
+                    cube, summary = build_cube(data), build_summary(data)
+                try:
+                    write_cache(cube, path, key, CUBE_SUFFIX)
+                    write_cache(summary, path, key, SUMMARY_SUFFIX)
+                except OSError:
+                    pass
+            return cube, summary
+
+    def refresh(self):
+        """Pick up new, changed and removed exports; return the merged cube."""
+        with self._lock:
+            # Listed under the lock: a listing taken before another thread's
+            # refresh would look like files had gone missing
+            current = {path: fingerprint(path) for path in self.paths()}
+            seen = {path: key for path, (key, _, _) in self.files.items()}
+            seen.update({path: key for path, (key, _) in self.rejected.items()})
+            if self.cube is not None and current == seen:
+                return self.cube
+            if not current:
+                raise FileNotFoundError(f"no exports matching {self.pattern} in {self.directory}")
+
+            # Rejected exports are checked again: what they overlapped may be gone
+            changed = [path for path, key in current.items() if path not in self.files or self.files[path][0] != key]
+            kept = {path: entry for path, entry in self.files.items() if path in current and path not in changed}
+            appended_only = self.cube is not None and len(kept) == len(self.files)
+            added = {path: (current[path], *self._ingest(path, current[path])) for path in changed}
+            self.rejected = {}
+
+            # An export repeating months already loaded would be counted twice
+            covered = {}
+            for path, (_, cube, _) in kept.items():
+                covered.update(dict.fromkeys(_months(cube), path))
+            for path in sorted(added):
+                months = _months(added[path][1])
+                overlap = sorted(month for month in months if month in covered)
+                if overlap:
+                    fy, month = overlap[0]
+                    self.rejected[path] = (current[path], (
+                        f"{os.path.basename(path)} repeats {len(overlap)} month(s) already loaded from "
+                        f"{os.path.basename(covered[overlap[0]])}, including FY {fy} {month}"
+                    ))
+                    del added[path]
+                else:
+                    covered.update(dict.fromkeys(months, path))
+            data_loader.evict(self.rejected)
+            if appended_only and not added:
+                # Only rejected exports changed
+                return self.cube
+
+            if appended_only:
+                parts = [(None, self.cube, self.summary)] + list(added.values())
+            else:
+                data_loader.evict([path for path in self.files if path not in kept])
+                parts = list({**kept, **added}.values())
+            cube = merge_cubes([cube for _, cube, _ in parts])
+
+            self.files = {**kept, **added}
+            self.cube = cube
+            self.summary = merge_summaries([summary for _, _, summary in parts])
+            accepted = sorted((path, key) for path, (key, _, _) in self.files.items())
+            self.key = hashlib.sha1(repr(accepted).encode()).hexdigest()
+            self.version += 1
+            self._data = None
+        return cube
+
+    def rejections(self):
+        """Why each rejected export was left out, in path order."""
+        with self._lock:
+            return [reason for _, (_, reason) in sorted(self.rejected.items())]
+
+    def snapshot(self, with_data=True):
+        """Refresh and return ``(version, key, cube, summary, data)`` of one consistent state.
+
+        ``data`` is the cleaned rows of every export, or None without
+        ``with_data``. All five are read under the lock, so a concurrent
+        refresh can't pair one state's cube with another's rows.
+        """
+        self.refresh()
+        with self._lock:
+            if with_data and self._data is None:
+                frames = [data_loader.load_data(path) for path in self.files]
+                self._data = frames[0] if len(frames) == 1 else concat_frames(frames)
+            return self.version, self.key, self.cube, self.summary, self._data if with_data else None
+
+
+catalog = DatasetCatalog()
@@ -0,0 +1,279 @@
+"""Vega-Lite versions of the charts, rendered in the browser.
+
+Each function takes the same aggregate table as its counterpart in charts.py
+and returns ``(data, spec)`` for ``st.vega_lite_chart``. Only the table is
+sent to the client, so a page view costs no rasterizing on the server, and
+zoom, pan and tooltips happen client-side without a rerun.
+"""
+from data_loader import MONTH_ORDER
+from geography import outline
+
+
+# Matches the dark_background matplotlib style the static charts use
+CONFIG = {
+    'background': 'black',
+    'font': 'sans-serif',
+    'title': {'color': 'lime', 'fontSize': 14, 'fontWeight': 'bold'},
+    'axis': {'labelColor': 'white', 'titleColor': 'white', 'domainColor': 'white', 'tickColor': 'white',
+             'gridColor': 'white', 'gridOpacity': 0.3, 'gridDash': [4, 4]},
+    'legend': {'labelColor': 'white', 'titleColor': 'white'},
+    'view': {'stroke': None},
+}
+
+# Drag to pan and scroll to zoom on both axes, all in the browser
+ZOOM = {'name': 'zoom', 'select': 'interval', 'bind': 'scales'}
+
+
+def _spec(title, **spec):
+    return {'title': title, 'config': CONFIG, 'height': 400, **spec}
+
+
+def total_weight_by_drug(total_weight_by_drug):
+    data = total_weight_by_drug.sort_values(ascending=False).reset_index()
+    return data, _spec(
+        'Total Weight by Drug Type',
+        mark={'type': 'bar', 'color': 'sandybrown', 'tooltip': True},
+        encoding={
+            'x': {'field': 'Drug Type', 'type': 'nominal', 'sort': None, 'axis': {'labelAngle': -45}},
+            'y': {'field': 'Weight (lbs)', 'type': 'quantitative', 'title': 'Total Weight (lbs)'},
+        },
+    )
+
+
+def region_trends_top5(region_drug_trends_top5):
+    data = region_drug_trends_top5.stack().rename('Weight (lbs)').reset_index()
+    return data, _spec(
+        'Total Weight of Top 5 Drugs by Region',
+        mark={'type': 'bar', 'tooltip': True},
+        encoding={
+            'x': {'field': 'Region', 'type': 'nominal', 'axis': {'labelAngle': 0}},
+            'xOffset': {'field': 'Drug Type', 'type': 'nominal', 'sort': list(region_drug_trends_top5.columns)},
+            'y': {'field': 'Weight (lbs)', 'type': 'quantitative', 'title': 'Total Weight (lbs)'},
+            'color': {'field': 'Drug Type', 'type': 'nominal', 'sort': list(region_drug_trends_top5.columns),
+                      'scale': {'scheme': 'yelloworangered'}},
+        },
+    )
+
+
+def drug_share_over_time(area_chart_data):
+    data = area_chart_data.melt(ignore_index=False, var_name='Drug Type', value_name='Count of Event').reset_index()
+    return data, _spec(
+        'Share of Drug Types Over Time',
+        params=[ZOOM],
+        mark={'type': 'area', 'tooltip': True},
+        encoding={
+            'x': {'field': 'Month', 'type': 'temporal', 'timeUnit': 'yearmonth', 'title': 'Month'},
+            'y': {'field': 'Count of Event', 'type': 'quantitative', 'stack': 'zero', 'title': 'Number of Events'},
+            'color': {'field': 'Drug Type', 'type': 'nominal', 'scale': {'scheme': 'category10'}},
+        },
+    )
+
+
+def drug_event_trends(trends):
+    data = trends.melt(ignore_index=False, var_name='Drug Type', value_name='Events').reset_index()
+    return data.dropna().round({'Events': 1}), _spec(
+        'Monthly Events of Top Drug Types (3-Month Rolling Mean)',
+        params=[ZOOM],
+        mark={'type': 'line', 'strokeWidth': 2, 'tooltip': True},
+        encoding={
+            'x': {'field': 'Month', 'type': 'temporal', 'timeUnit': 'yearmonth', 'title': 'Month'},
+            'y': {'field': 'Events', 'type': 'quantitative', 'title': 'Number of Events'},
+            'color': {'field': 'Drug Type', 'type': 'nominal', 'sort': list(trends.columns),
+                      'scale': {'scheme': 'yelloworangered'}},
+        },
+    )
+
+
+def drug_event_yoy(yoy):
+    return yoy.round({'Change %': 1}), _spec(
+        'Year-over-Year Change in Monthly Events',
+        layer=[
+            {'params': [ZOOM],
+             'mark': {'type': 'line', 'strokeWidth': 2},
+             'encoding': {
+                 'x': {'field': 'Month', 'type': 'temporal', 'timeUnit': 'yearmonth', 'title': 'Month'},
+                 'y': {'field': 'Change', 'type': 'quantitative', 'title': 'Change in Events from Previous FY'},
+                 'color': {'field': 'Drug Type', 'type': 'nominal', 'sort': list(yoy['Drug Type'].unique()),
+                           'scale': {'scheme': 'yelloworangered'}},
+                 'tooltip': [
+                     {'field': 'Month', 'type': 'temporal', 'timeUnit': 'yearmonth'},
+                     {'field': 'Drug Type', 'type': 'nominal'},
+                     {'field': 'Events', 'type': 'quantitative'},
+                     {'field': 'Change', 'type': 'quantitative'},
+                     {'field': 'Change %', 'type': 'quantitative'},
+                 ],
+             }},
+            {'mark': {'type': 'rule', 'color': 'white'}, 'encoding': {'y': {'datum': 0}}},
+        ],
+    )
+
+
+def drug_seasonality(profile):
+    data = profile.melt(ignore_index=False, var_name='Drug Type', value_name='Seasonal').reset_index()
+    return data.round({'Seasonal': 1}), _spec(
+        'Seasonal Pattern of Events by Fiscal Month',
+        layer=[
+            {'mark': {'type': 'line', 'point': True, 'tooltip': True},
+             'encoding': {
+                 'x': {'field': 'Month (abbv)', 'type': 'ordinal', 'sort': list(profile.index), 'title': 'Fiscal Month'},
+                 'y': {'field': 'Seasonal', 'type': 'quantitative', 'title': 'Events Above/Below Trend'},
+                 'color': {'field': 'Drug Type', 'type': 'nominal', 'sort': list(profile.columns),
+                           'scale': {'scheme': 'yelloworangered'}},
+             }},
+            {'mark': {'type': 'rule', 'color': 'white'}, 'encoding': {'y': {'datum': 0}}},
+        ],
+    )
+
+
+def region_component_heatmap(regional_component_data):
+    data = regional_component_data.stack().rename('Count of Event').reset_index()
+    encoding = {
+        'x': {'field': 'Component', 'type': 'nominal', 'axis': {'labelAngle': 0}},
+        'y': {'field': 'Region', 'type': 'nominal'},
+    }
+    return data, _spec(
+        'Regional Contribution of Events by Component',
+        encoding=encoding,
+        layer=[
+            {'mark': {'type': 'rect', 'stroke': 'black', 'tooltip': True},
+             'encoding': {'color': {'field': 'Count of Event', 'type': 'quantitative',
+                                    'scale': {'scheme': 'yelloworangered'}}}},
+            {'mark': {'type': 'text', 'color': 'black'},
+             'encoding': {'text': {'field': 'Count of Event', 'type': 'quantitative', 'format': 'd'}}},
+        ],
+    )
+
+
+def monthly_events_polar(monthly_events):
+    # Equal slices per month with the radius carrying the event count
+    data = monthly_events.rename_axis('Month').reset_index().assign(Slice=1, Order=range(len(monthly_events)))
+    return data, _spec(
+        'Monthly Event Distribution on Polar Axis',
+        mark={'type': 'arc', 'stroke': 'black', 'opacity': 0.8, 'tooltip': True},
+        encoding={
+            'theta': {'field': 'Slice', 'type': 'quantitative', 'stack': True},
+            'radius': {'field': 'Count of Event', 'type': 'quantitative', 'scale': {'zero': True}},
+            'order': {'field': 'Order'},
+            'color': {'field': 'Month', 'type': 'ordinal', 'sort': MONTH_ORDER,
+                      'scale': {'scheme': 'yelloworangered'}},
+            'tooltip': [{'field': 'Month'}, {'field': 'Count of Event', 'type': 'quantitative'}],
+        },
+    )
+
+
+def monthly_trends_top3(drug_trends_top3):
+    data = drug_trends_top3.melt(ignore_index=False, var_name='Drug Type', value_name='Weight (lbs)').reset_index()
+    return data, _spec(
+        'Monthly Trends in Top 3 Drug Types by Weight',
+        params=[ZOOM],
+        mark={'type': 'line', 'point': True, 'tooltip': True},
+        encoding={
+            'x': {'field': 'Month (abbv)', 'type': 'ordinal', 'sort': MONTH_ORDER, 'title': 'Month'},
+            'y': {'field': 'Weight (lbs)', 'type': 'quantitative', 'title': 'Total Weight (lbs)'},
+            'color': {'field': 'Drug Type', 'type': 'nominal', 'sort': list(drug_trends_top3.columns),
+                      'scale': {'scheme': 'yelloworangered'}},
+        },
+    )
+
+
+def yearly_top3_events(year, monthly_pivot, year_peaks):
+    data = monthly_pivot.melt(ignore_index=False, var_name='Drug Type', value_name='Count of Event').reset_index()
+    peaks = year_peaks[['Drug Type', 'Peak Month', 'Peak Events']].astype({'Drug Type': str, 'Peak Month': str})
+    x = {'field': 'Month (abbv)', 'type': 'ordinal', 'sort': MONTH_ORDER, 'title': 'Month'}
+    y = {'field': 'Count of Event', 'type': 'quantitative', 'title': 'Number of Events'}
+    peak_encoding = {
+        'x': {**x, 'field': 'Peak Month'},
+        'y': {**y, 'field': 'Peak Events'},
+    }
+    return data, _spec(
+        f'Monthly Trends for Top 3 Drugs in {year}',
+        layer=[
+            {'params': [ZOOM], 'mark': {'type': 'line', 'tooltip': True},
+             'encoding': {'x': x, 'y': y, 'color': {'field': 'Drug Type', 'type': 'nominal'}}},
+            {'data': {'values': peaks.to_dict('records')},
+             'mark': {'type': 'point', 'shape': 'triangle-down', 'filled': True, 'color': 'sandybrown', 'size': 80},
+             'encoding': {**peak_encoding, 'tooltip': [{'field': 'Drug Type'}, {'field': 'Peak Events'}]}},
+            {'data': {'values': peaks.to_dict('records')},
+             'mark': {'type': 'text', 'text': 'Peak', 'dy': -12, 'color': 'sandybrown', 'fontSize': 9},
+             'encoding': peak_encoding},
+        ],
+    )
+
+
+def event_spikes(lines, marked):
+    data = lines.melt(ignore_index=False, var_name='Series', value_name='Events').reset_index()
+    spikes = marked[['Series', 'Month', 'Events', 'Baseline', 'Score']].assign(
+        Month=marked['Month'].dt.strftime('%Y-%m-%d'))
+    x = {'field': 'Month', 'type': 'temporal', 'timeUnit': 'yearmonth', 'title': 'Month'}
+    y = {'field': 'Events', 'type': 'quantitative', 'title': 'Number of Events'}
+    return data, _spec(
+        'Unusual Months for the Most Anomalous Area and Drug Type Series',
+        layer=[
+            {'params': [ZOOM], 'mark': {'type': 'line', 'tooltip': True},
+             'encoding': {'x': x, 'y': y, 'color': {'field': 'Series', 'type': 'nominal', 'sort': list(lines.columns),
+                                                    'title': 'Area · Drug Type', 'scale': {'scheme': 'category10'}}}},
+            {'data': {'values': spikes.to_dict('records')},
+             'mark': {'type': 'point', 'shape': 'triangle-down', 'filled': True, 'color': 'sandybrown', 'size': 80},
+             'encoding': {'x': x, 'y': y, 'tooltip': [{'field': 'Series'}, {'field': 'Events'},
+                                                      {'field': 'Baseline'}, {'field': 'Score'}]}},
+        ],
+    )
+
+
+def top_areas_events(pivot_data):
+    data = pivot_data.melt(ignore_index=False, var_name='Drug Type', value_name='Count of Event').reset_index()
+    return data, _spec(
+        'Stacked Bar Chart: Events by Drug Type for Top 10 Areas',
+        mark={'type': 'bar', 'tooltip': True},
+        encoding={
+            'x': {'field': 'Area', 'type': 'nominal', 'axis': {'labelAngle': -45}},
+            'y': {'field': 'Count of Event', 'type': 'quantitative', 'stack': 'zero', 'title': 'Number of Events'},
+            'color': {'field': 'Drug Type', 'type': 'nominal', 'scale': {'scheme': 'category10'}},
+        },
+    )
+
+
+def area_map(locations):
+    # The drug type picker filters and re-sums the per Area x Drug Type rows in the browser
+    drugs = sorted(locations['Drug Type'].unique())
+    return locations, _spec(
+        'Events by Area of Responsibility',
+        height=500,
+        projection={'type': 'mercator'},
+        params=[{'name': 'drug', 'value': 'All',
+                 'bind': {'input': 'select', 'options': ['All', *drugs], 'name': 'Drug Type '}}],
+        layer=[
+            {'data': {'values': outline()},
+             'mark': {'type': 'geoshape', 'fill': '#303030', 'stroke': 'white', 'strokeWidth': 0.8}},
+            {'transform': [
+                {'filter': "drug == 'All' || datum['Drug Type'] == drug"},
+                {'aggregate': [{'op': 'sum', 'field': 'Count of Event', 'as': 'Events'},
+                               {'op': 'sum', 'field': 'Weight (lbs)', 'as': 'Weight (lbs)'}],
+                 'groupby': ['Area', 'Location', 'Region', 'Latitude', 'Longitude']},
+            ],
+             'mark': {'type': 'circle', 'opacity': 0.7, 'stroke': 'black'},
+             'encoding': {
+                 'longitude': {'field': 'Longitude', 'type': 'quantitative'},
+                 'latitude': {'field': 'Latitude', 'type': 'quantitative'},
+                 'size': {'field': 'Events', 'type': 'quantitative', 'title': 'Number of Events',
+                          'scale': {'range': [20, 1500]}, 'legend': {'symbolFillColor': 'gray'}},
+                 'color': {'field': 'Region', 'type': 'nominal', 'scale': {'scheme': 'category10'}},
+                 'tooltip': [{'field': 'Area'}, {'field': 'Location'}, {'field': 'Region'},
+                             {'field': 'Events', 'type': 'quantitative', 'format': ','},
+                             {'field': 'Weight (lbs)', 'type': 'quantitative', 'format': ',.0f'}],
+             }},
+        ],
+    )
+
+
+def region_land_filter(regional_land_filter):
+    data = regional_land_filter.melt(ignore_index=False, var_name='Land Filter', value_name='Count of Event')
+    return data.reset_index(), _spec(
+        'Regional Distribution of Events by Land Filter',
+        mark={'type': 'bar', 'tooltip': True},
+        encoding={
+            'x': {'field': 'Region', 'type': 'nominal', 'axis': {'labelAngle': -45}},
+            'y': {'field': 'Count of Event', 'type': 'quantitative', 'stack': 'zero', 'title': 'Number of Events'},
+            'color': {'field': 'Land Filter', 'type': 'nominal', 'scale': {'scheme': 'yelloworangered'}},
+        },
+    )
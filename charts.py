@@ -0,0 +1,266 @@
+import numpy as np
+
+from data_loader import MONTH_ORDER
+from geography import outline
+
+
+THEME = 'dark_background'
+
+# Charts are drawn on Figure objects owned by the caller rather than through
+# pyplot, so nothing is registered in pyplot's global figure manager and a
+# figure is freed as soon as the caller drops it. matplotlib and seaborn are
+# imported on first use, so a page served with the interactive backend never
+# loads them.
+
+
+def _figure(**kwargs):
+    from matplotlib.figure import Figure
+
+    return Figure(**kwargs)
+
+
+def _rotate_xticks(ax, ha='center'):
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment(ha)
+
+
+def total_weight_by_drug(total_weight_by_drug):
+    fig = _figure(figsize=(12, 6))
+    ax = fig.subplots()
+    total_weight_by_drug.sort_values(ascending=False).plot(kind='bar', color='sandybrown', zorder=2, ax=ax)
+    ax.set_title('Total Weight by Drug Type', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Drug Type', fontsize=12)
+    ax.set_ylabel('Total Weight (lbs)', fontsize=12)
+    _rotate_xticks(ax, ha='right')
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    return fig
+
+
+def region_trends_top5(region_drug_trends_top5):
+    fig = _figure(figsize=(14, 8))
+    ax = fig.subplots()
+    region_drug_trends_top5.plot(kind='bar', colormap='YlOrRd', zorder=2, ax=ax)
+    ax.set_title('Total Weight of Top 5 Drugs by Region', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Region', fontsize=12)
+    ax.set_ylabel('Total Weight (lbs)', fontsize=12)
+    ax.legend(title='Drug Type', fontsize=10)
+    _rotate_xticks(ax)
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    return fig
+
+
+def monthly_trends_top3(drug_trends_top3):
+    fig = _figure(figsize=(12, 8))
+    ax = fig.subplots()
+    drug_trends_top3.plot(marker='o', colormap='YlOrRd', ax=ax)
+    ax.set_title('Monthly Trends in Top 3 Drug Types by Weight', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Total Weight (lbs)', fontsize=12)
+    ax.legend(title='Drug Type', fontsize=10)
+    ax.grid(axis='both', linestyle='--', alpha=0.0)
+    _rotate_xticks(ax)
+    return fig
+
+
+def yearly_top3_events(year, monthly_pivot, year_peaks):
+    fig = _figure(figsize=(12, 6))
+    ax = fig.subplots()
+    monthly_pivot.plot(kind='line', zorder=2, ax=ax)
+
+    for peak_month, peak_value in zip(year_peaks['Peak Month'], year_peaks['Peak Events']):
+        peak_index = MONTH_ORDER.index(peak_month)
+        ax.plot(peak_index, peak_value, marker='v', color='sandybrown', markersize=8)
+        # Offset in points rather than data units so sparse slices don't push
+        # the label (and the tight bounding box) far above the axes
+        ax.annotate(
+            'Peak', (peak_index, peak_value), xytext=(0, 6), textcoords='offset points',
+            fontsize=9, color='sandybrown', ha='center'
+        )
+
+    ax.set_title(f'Monthly Trends for Top 3 Drugs in {year}', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Number of Events')
+    _rotate_xticks(ax)
+    ax.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    ax.grid(axis='x', linestyle='--', alpha=0.7, zorder=1)
+    return fig
+
+
+def drug_share_over_time(area_chart_data):
+    fig = _figure(figsize=(14, 8))
+    ax = fig.subplots()
+    area_chart_data.plot(kind='area', stacked=True, colormap='tab10', zorder=2, ax=ax)
+    ax.set_title('Share of Drug Types Over Time', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Number of Events')
+    _rotate_xticks(ax)
+    ax.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    fig.tight_layout()
+    return fig
+
+
+def drug_event_trends(trends):
+    fig = _figure(figsize=(14, 7))
+    ax = fig.subplots()
+    trends.plot(colormap='YlOrRd', linewidth=2, zorder=2, ax=ax)
+    ax.set_title('Monthly Events of Top Drug Types (3-Month Rolling Mean)', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Number of Events')
+    ax.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='both', linestyle='--', alpha=0.7, zorder=1)
+    fig.tight_layout()
+    return fig
+
+
+def drug_event_yoy(yoy):
+    fig = _figure(figsize=(14, 7))
+    ax = fig.subplots()
+    changes = yoy.pivot(index='Month', columns='Drug Type', values='Change')
+    changes[yoy['Drug Type'].unique()].plot(colormap='YlOrRd', linewidth=2, zorder=2, ax=ax)
+    ax.axhline(0, color='white', linewidth=0.8, zorder=1)
+    ax.set_title('Year-over-Year Change in Monthly Events', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Change in Events from Previous FY')
+    ax.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='both', linestyle='--', alpha=0.7, zorder=1)
+    fig.tight_layout()
+    return fig
+
+
+def drug_seasonality(profile):
+    fig = _figure(figsize=(12, 6))
+    ax = fig.subplots()
+    profile.plot(marker='o', colormap='YlOrRd', zorder=2, ax=ax)
+    ax.axhline(0, color='white', linewidth=0.8, zorder=1)
+    ax.set_xticks(range(len(profile.index)), profile.index)
+    ax.set_title('Seasonal Pattern of Events by Fiscal Month', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Fiscal Month')
+    ax.set_ylabel('Events Above/Below Trend')
+    ax.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    fig.tight_layout()
+    return fig
+
+
+def event_spikes(lines, marked):
+    from matplotlib import colormaps
+
+    fig = _figure(figsize=(14, 7))
+    ax = fig.subplots()
+    # Plotted directly rather than through pandas, so the lines and the
+    # markers share one date axis
+    ax.set_prop_cycle(color=colormaps['tab10'].colors)
+    for series in lines.columns:
+        ax.plot(lines.index, lines[series], label=series, zorder=2)
+    ax.plot(marked['Month'], marked['Events'], 'v', markersize=8, color='sandybrown', zorder=3, label='Spike')
+    ax.set_title('Unusual Months for the Most Anomalous Area and Drug Type Series', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Number of Events')
+    ax.legend(title='Area · Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    fig.tight_layout()
+    return fig
+
+
+def top_areas_events(pivot_data):
+    fig = _figure(figsize=(14, 8))
+    ax = fig.subplots()
+    pivot_data.plot(kind='bar', stacked=True, colormap='tab10', zorder=2, ax=ax)
+    ax.set_title('Stacked Bar Chart: Events by Drug Type for Top 10 Areas', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Area')
+    ax.set_ylabel('Number of Events')
+    _rotate_xticks(ax, ha='right')
+    ax.legend(title='Drug Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=1)
+    return fig
+
+
+def area_map(locations):
+    totals = locations.groupby(['Area', 'Region', 'Latitude', 'Longitude'], as_index=False)['Count of Event'].sum()
+    fig = _figure(figsize=(14, 8))
+    ax = fig.subplots()
+    for feature in outline():
+        longitude, latitude = np.array(feature['geometry']['coordinates'][0]).T
+        ax.fill(longitude, latitude, facecolor='#303030', edgecolor='white', linewidth=0.8, zorder=1)
+
+    # Marker area proportional to events
+    sizes = 1500 * totals['Count of Event'] / max(totals['Count of Event'].max(), 1)
+    for color, (region, group) in enumerate(totals.groupby('Region')):
+        ax.scatter(group['Longitude'], group['Latitude'], s=sizes[group.index], color=f'C{color}', alpha=0.7,
+                   edgecolor='black', label=region, zorder=2)
+    for area in totals.nlargest(8, 'Count of Event').itertuples():
+        ax.annotate(area.Area.title(), (area.Longitude, area.Latitude), xytext=(0, 8), textcoords='offset points',
+                    fontsize=9, ha='center', color='white', zorder=3)
+
+    # Roughly equal-area at the contiguous US's latitude
+    ax.set_aspect(1 / np.cos(np.radians(37)))
+    ax.set_axis_off()
+    if not totals.empty:
+        legend = ax.legend(title='Region', loc='lower left')
+        for handle in legend.legend_handles:
+            handle.set_sizes([60])
+    ax.set_title('Events by Area of Responsibility', fontsize=14, fontweight='bold', color='lime')
+    fig.tight_layout()
+    return fig
+
+
+def region_land_filter(regional_land_filter):
+    fig = _figure(figsize=(14, 8))
+    ax = fig.subplots()
+    regional_land_filter.plot(kind='bar', stacked=True, colormap='YlOrRd', zorder=2, ax=ax)
+    ax.set_title('Regional Distribution of Events by Land Filter', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Region')
+    ax.set_ylabel('Number of Events')
+    _rotate_xticks(ax, ha='right')
+    ax.legend(title='Land Filter', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='both', linestyle='--', alpha=0.7, zorder=1)
+    fig.tight_layout()
+    return fig
+
+
+def region_component_heatmap(regional_component_data):
+    import seaborn as sns
+
+    fig = _figure(figsize=(12, 8))
+    ax = fig.subplots()
+    sns.heatmap(regional_component_data, annot=True, fmt="d", cmap="YlOrRd", linewidths=0.5, linecolor='black', ax=ax)
+    ax.set_title('Regional Contribution of Events by Component', fontsize=14, fontweight='bold', color='lime')
+    ax.set_xlabel('Component')
+    ax.set_ylabel('Region')
+    fig.tight_layout()
+    return fig
+
+
+def monthly_events_polar(monthly_events):
+    from matplotlib import colormaps
+
+    angles = np.linspace(0, 2 * np.pi, len(MONTH_ORDER), endpoint=False).tolist()
+
+    fig = _figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, polar=True)
+
+    ax.bar(
+        angles, monthly_events, align='center', alpha=0.8, edgecolor="black",
+        color=colormaps['YlOrRd'](np.linspace(0, 1, len(MONTH_ORDER)))
+    )
+
+    ax.set_xticks(angles)
+    ax.set_xticklabels(MONTH_ORDER, fontsize=10, fontweight='bold')
+    ax.yaxis.grid(color='white', linestyle='--', linewidth=0.7)
+    ax.spines['polar'].set_visible(False)
+    ax.tick_params(axis='y', colors='red')
+    ax.tick_params(axis='x', colors='black')
+    for label in ax.get_yticklabels():
+        label.set_fontweight('bold')
+
+    for label in ax.get_xticklabels():
+        label.set_bbox(dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.1'))
+
+    ax.set_title('Monthly Event Distribution on Polar Axis', va='bottom', fontsize=14, fontweight='bold', color='lime')
+    fig.tight_layout()
+    return fig
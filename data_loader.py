@@ -0,0 +1,182 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nationwide-drugs-fy21-fy24.csv')
+
+MONTH_ORDER = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+CATEGORY_COLUMNS = ['Component', 'Region', 'Land Filter', 'Area of Responsibility', 'Drug Type']
+
+CSV_DTYPES = {
+    'FY': 'int16',
+    'Month (abbv)': pd.CategoricalDtype(MONTH_ORDER, ordered=True),
+    **{column: 'category' for column in CATEGORY_COLUMNS},
+    'Count of Event': 'int32',
+    'Sum Qty (lbs)': 'float32',
+}
+
+# Stored in every Feather cache next to the source fingerprint. Bump it when
+# clean_data, CSV_DTYPES or the layout of the cached frames (rows, cube or
+# summary) changes, so caches written by older code are rebuilt
+CACHE_VERSION = 1
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def fingerprint(path):
+    # Size + modification time is enough to notice a replaced export without reading it
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _recode_categories(values, func):
+    # Apply a string cleanup to the (few) categories instead of every row,
+    # merging categories that become identical after cleanup
+    old_categories = values.cat.categories
+    new_labels = pd.Index(func(pd.Series(old_categories)))
+    categories = pd.Index(new_labels.unique())
+    remap = categories.get_indexer(new_labels)
+    codes = values.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Categorical.from_codes(new_codes, categories=categories)
+
+
+def clean_data(data):
+    data = data.rename(columns={'Sum Qty (lbs)': 'Weight (lbs)'})
+    data['Land Filter'] = _recode_categories(data['Land Filter'], lambda s: s.str.strip().str.upper())
+    data['Area'] = _recode_categories(
+        data['Area of Responsibility'], lambda s: s.str.replace(" FIELD OFFICE", "", regex=False)
+    )
+    return data
+
+
+def concat_frames(frames):
+    # Frames read separately infer their own categories; union them again
+    # rather than letting concat fall back to plain strings
+    combined = pd.concat(frames, ignore_index=True)
+    for column in combined.columns:
+        if combined[column].dtype.kind not in 'iufb' and not isinstance(combined[column].dtype, pd.CategoricalDtype):
+            combined[column] = combined[column].astype('category')
+    return combined
+
+
+def read_data(path=DATA_FILE):
+    with stage('load.csv', path=os.path.basename(path)):
+        data = pd.read_csv(path, dtype=CSV_DTYPES)
+    with stage('clean'):
+        return clean_data(data)
+
+
+def read_preview(path=DATA_FILE, rows=10):
+    return clean_data(pd.read_csv(path, dtype=CSV_DTYPES, nrows=rows))
+
+
+def cache_path(path, suffix='.feather'):
+    return os.path.splitext(path)[0] + suffix
+
+
+def write_cache(data, path, key, suffix='.feather'):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'source_fingerprint'] = key.encode()
+    metadata[b'cache_version'] = str(CACHE_VERSION).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Uncompressed and in one record batch, so read_cache can hand out
+    # columns backed by the memory-mapped file; written aside and renamed
+    # so a concurrent reader never sees a partial cache
+    target = cache_path(path, suffix)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        feather.write_feather(table.combine_chunks(), tmp, compression='uncompressed',
+                              chunksize=max(table.num_rows, 1))
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return target
+
+
+def read_cache(path, key, suffix='.feather'):
+    import pyarrow as pa
+
+    target = cache_path(path, suffix)
+    if not os.path.exists(target):
+        return None
+    with stage('load.cache', path=os.path.basename(target)):
+        try:
+            with pa.memory_map(target) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+        metadata = table.schema.metadata or {}
+        if metadata.get(b'source_fingerprint') != key.encode():
+            return None
+        if metadata.get(b'cache_version') != str(CACHE_VERSION).encode():
+            return None
+        # One block per column lets numeric columns and categorical codes
+        # point into the mapped file instead of being copied; they are
+        # read-only, and copy-on-write gives writers their own copy
+        return table.to_pandas(split_blocks=True)
+
+
+def load_data(path=DATA_FILE):
+    """Return the cleaned seizure data, parsing the CSV only when it has changed.
+
+    The cleaned frame is kept in a Feather file next to the CSV and in memory;
+    both are rebuilt when the CSV's fingerprint changes. The result is shared
+    by every session in the server process, so callers must treat it as
+    read-only.
+    """
+    path = os.path.abspath(path)
+    key = fingerprint(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        data = read_cache(path, key)
+        if data is None:
+            data = read_data(path)
+            try:
+                write_cache(data, path, key)
+            except OSError:
+                # Read-only deployments still work, they just parse the CSV
+                pass
+        _cache[path] = (key, data)
+    return data
+
+
+def evict(paths):
+    """Drop the in-memory frames of exports no longer loaded."""
+    with _cache_lock:
+        for path in paths:
+            _cache.pop(os.path.abspath(path), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prebuild the columnar cache for seizure CSV exports.')
+    parser.add_argument('paths', nargs='*', default=[DATA_FILE], help='CSV exports to convert')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        path = os.path.abspath(path)
+        start = time.perf_counter()
+        data = read_data(path)
+        target = write_cache(data, path, fingerprint(path))
+        print(f"{target}: {len(data)} rows in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
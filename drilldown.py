@@ -0,0 +1,114 @@
+"""FY-over-FY drill-down over the Region, Area, Drug Type, Land Filter and Component hierarchy.
+
+A drill path is a sequence of chosen values, e.g. Drug Type = Fentanyl, then
+Area = SAN DIEGO. Its children are the values of a further dimension
+(here Land Filter) under that path, each with its totals in two fiscal
+years and the change between them. ``DeltaTables`` materializes every
+grouping a drill step can ask for up front. Groupings are indexed by the
+path's dimensions followed by the next dimension, so a step is a lookup of
+the path's values in a sorted index, not a regroup of the cube. The
+groupings are built from a single FY-pivoted table at the finest grain,
+whose size depends on the dimensions' cardinalities rather than on how
+many months of exports have been loaded.
+
+    from drilldown import DeltaTables
+    deltas = DeltaTables(cube)
+    deltas.children([('Drug Type', 'Fentanyl')], 'Area', 2023, 2024)
+"""
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+
+# Also the default order of drill steps
+DRILL_DIMENSIONS = ['Region', 'Area', 'Drug Type', 'Land Filter', 'Component']
+DRILL_MEASURES = ['Count of Event', 'Weight (lbs)']
+
+
+class DeltaTables:
+    """Totals per FY and FY-over-FY changes of every drill grouping of a cube.
+
+    ``tables`` maps a grouping's index levels to a frame whose columns are
+    ('Total', measure, FY) and ('Change', measure, FY), the latter the
+    change from the previous FY.
+    """
+
+    def __init__(self, cube, dimensions=DRILL_DIMENSIONS):
+        self.dimensions = list(dimensions)
+        with stage('drilldown.build', rows=len(cube)):
+            finest = cube.groupby(self.dimensions + ['FY'], observed=True)[DRILL_MEASURES].sum()
+            finest = finest.unstack('FY', fill_value=0).sort_index(axis=1)
+            self.years = finest.columns.get_level_values('FY').unique().tolist()
+            self.columns = pd.MultiIndex.from_tuples(
+                [('Total', measure, year) for measure in DRILL_MEASURES for year in self.years]
+                + [('Change', measure, year) for measure in DRILL_MEASURES for year in self.years[1:]]
+            )
+            self.tables = {(): self._materialize(finest.sum().to_frame().T)}
+            for dim in self.dimensions:
+                others = [other for other in self.dimensions if other != dim]
+                for size in range(len(others) + 1):
+                    for prefix in combinations(others, size):
+                        levels = prefix + (dim,)
+                        self.tables[levels] = self._materialize(finest.groupby(level=list(levels), observed=True).sum())
+
+    def nbytes(self):
+        return sum(int(table.memory_usage(index=True, deep=True).sum()) for table in self.tables.values())
+
+    def _materialize(self, totals):
+        values = totals.to_numpy(dtype=np.float64)
+        by_year = values.reshape(len(values), len(DRILL_MEASURES), len(self.years))
+        changes = np.diff(by_year, axis=2).reshape(len(values), -1)
+        return pd.DataFrame(np.hstack([values, changes]), index=totals.index, columns=self.columns)
+
+    def _levels(self, path, dim=None):
+        path_dims = {path_dim for path_dim, _ in path}
+        levels = tuple(d for d in self.dimensions if d in path_dims and d != dim)
+        return levels if dim is None else levels + (dim,)
+
+    def _compare(self, rows, base, target, measure):
+        base_totals = rows[('Total', measure, base)].to_numpy()
+        target_totals = rows[('Total', measure, target)].to_numpy()
+        if (base, target) in zip(self.years, self.years[1:]):
+            # FY-over-FY: read the materialized change
+            change = rows[('Change', measure, target)].to_numpy()
+        else:
+            change = target_totals - base_totals
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent = np.where(base_totals > 0, change / base_totals * 100, np.nan)
+        return pd.DataFrame({
+            f'FY{base}': base_totals, f'FY{target}': target_totals, 'Change': change, 'Change %': percent,
+        }, index=rows.index)
+
+    def children(self, path, dim, base, target, measure='Weight (lbs)'):
+        """Each ``dim`` value under ``path`` with its ``measure`` in FY ``base`` and ``target``.
+
+        ``path`` is a list of (dimension, value) pairs; its dimensions must
+        differ from ``dim``. Rows are ordered by change, largest increase
+        first; values with nothing in either year are left out.
+        """
+        levels = self._levels(path, dim)
+        values = dict(path)
+        key = tuple(values[d] for d in levels[:-1])
+        table = self.tables[levels]
+        if key:
+            try:
+                table = table.loc[key]
+            except KeyError:
+                table = table.iloc[:0].droplevel(list(range(len(key))))
+        table = self._compare(table, base, target, measure)
+        table = table[(table[f'FY{base}'] != 0) | (table[f'FY{target}'] != 0)]
+        table.index = table.index.astype(str).rename(dim)
+        return table.sort_values('Change', ascending=False, kind='stable')
+
+    def total(self, path, base, target, measure='Weight (lbs)'):
+        """The ``measure`` of everything under ``path`` in FY ``base`` and ``target``, as a one-row table."""
+        levels = self._levels(path)
+        table = self.tables[levels]
+        if levels:
+            values = dict(path)
+            key = tuple(values[d] for d in levels)
+            table = table.reindex([key] if len(key) > 1 else [key[0]], fill_value=0)
+        return self._compare(table, base, target, measure)
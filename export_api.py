@@ -0,0 +1,203 @@
+"""The aggregates behind the page's charts as tables, over HTTP and from Python.
+
+Every section's rollup (see sections.py), plus the ``TABLES`` that have no
+chart, is exported as a flat table, filtered like the sidebar and encoded
+as JSON or an Arrow IPC stream. Tables are computed through the shared
+store's ``CubeIndex``, so an API request and a page run with the same
+filters share one memoized rollup. Responses carry an ETag derived from
+the data fingerprint, the export and the filters; clients that send it
+back in If-None-Match get 304 Not Modified until the data changes, without
+the rollup being looked up at all.
+
+    from export_api import export
+    export('total_weight_by_drug', {'Region': ['Southwest Border']})
+
+Served next to the page by the same process (see app.py), or on its own:
+
+    streamlit run app.py
+    python export_api.py --port 8000
+    curl 'http://localhost:8501/api/exports/monthly_events_polar?Region=Southwest+Border&format=arrow'
+"""
+import argparse
+import hashlib
+import io
+
+import aggregates as agg
+from filters import FILTER_DIMENSIONS
+from sections import SECTIONS, Section
+from store import store
+
+
+# Tables with no chart of their own on the page
+TABLES = [
+    Section('area_drug_events', 'Events by Area and Drug Type', agg.area_drug_events, None),
+]
+
+EXPORTS = {section.section_id: section for section in SECTIONS + TABLES}
+
+# Names of the tables in the original notebook-style script
+ALIASES = {
+    'region_drug_trends_top5': 'region_trends_top5',
+    'area_chart_data': 'drug_share_over_time',
+    'treemap_data': 'area_drug_events',
+    'regional_land_filter': 'region_land_filter',
+    'regional_component_data': 'region_component_heatmap',
+    'monthly_events': 'monthly_events_polar',
+}
+
+FORMATS = {
+    'json': 'application/json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+class ExportError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def resolve(name):
+    """The section exported as ``name``, a section id or one of ``ALIASES``."""
+    section = EXPORTS.get(ALIASES.get(name, name))
+    if section is None:
+        raise ExportError(f"unknown export {name!r}", status=404)
+    return section
+
+
+def selection_key(index, params):
+    """Normalized filter key of ``params``, a mapping of dimension to values.
+
+    Dimensions may also be written in snake case (``drug_type``) and values
+    are matched by their text, so query strings can be passed as they are.
+    """
+    dimensions = {dim.lower().replace(' ', '_'): dim for dim in FILTER_DIMENSIONS}
+    selection = {}
+    for name, values in params.items():
+        dim = name if name in FILTER_DIMENSIONS else dimensions.get(name)
+        if dim is None:
+            raise ExportError(f"unknown filter {name!r}; filter by one of {', '.join(FILTER_DIMENSIONS)}")
+        options = {str(option): option for option in index.options[dim]}
+        unknown = [value for value in values if str(value) not in options]
+        if unknown:
+            raise ExportError(f"unknown {dim} {', '.join(map(repr, unknown))}")
+        selection[dim] = [options[str(value)] for value in values]
+    return index.normalize(selection)
+
+
+def etag(data_key, section_id, filter_key, fmt):
+    digest = hashlib.sha1(repr((data_key, section_id, filter_key, fmt)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def export(name, selection=None, snapshot=None):
+    """The ``name`` table for a sidebar-style ``selection`` as a DataFrame."""
+    snapshot = snapshot or store.current()
+    section = resolve(name)
+    filter_key = selection_key(snapshot.index, selection or {})
+    return section.table(snapshot.index.rollup(filter_key, section.rollup))
+
+
+def encode(table, fmt):
+    """``table`` as bytes in one of ``FORMATS``."""
+    if fmt == 'json':
+        return table.to_json(orient='split', index=False, date_format='iso').encode()
+    import pyarrow as pa
+
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return sink.getvalue()
+
+
+def negotiate(params, accept=''):
+    """The format asked for by a ``format`` parameter or the Accept header; JSON by default."""
+    fmt = params.pop('format', [None])[-1]
+    if fmt is None:
+        fmt = 'arrow' if FORMATS['arrow'] in (accept or '') else 'json'
+    if fmt not in FORMATS:
+        raise ExportError(f"unknown format {fmt!r}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def respond(name, params, if_none_match=None, accept=''):
+    """Answer an export request; return ``(status, body, headers)``.
+
+    ``params`` maps query parameters to lists of values: filters plus an
+    optional ``format``.
+    """
+    params = dict(params)
+    snapshot = store.current()
+    section = resolve(name)
+    fmt = negotiate(params, accept)
+    filter_key = selection_key(snapshot.index, params)
+    tag = etag(snapshot.key, section.section_id, filter_key, fmt)
+    headers = {'ETag': tag, 'Cache-Control': 'no-cache', 'X-Data-Fingerprint': snapshot.key}
+    if if_none_match and tag in [value.strip() for value in if_none_match.split(',')]:
+        return 304, b'', headers
+    table = section.table(snapshot.index.rollup(filter_key, section.rollup))
+    headers['Content-Type'] = FORMATS[fmt]
+    return 200, encode(table, fmt), headers
+
+
+def catalog_listing():
+    """The exports, their aliases and the filter values they accept."""
+    snapshot = store.current()
+    aliases = {}
+    for alias, section_id in ALIASES.items():
+        aliases.setdefault(section_id, []).append(alias)
+    return {
+        'fingerprint': snapshot.key,
+        'formats': list(FORMATS),
+        'filters': {dim: [str(option) for option in snapshot.index.options[dim]] for dim in FILTER_DIMENSIONS},
+        'exports': [
+            {'name': section.section_id, 'title': section.title, 'aliases': aliases.get(section.section_id, [])}
+            for section in EXPORTS.values()
+        ],
+    }
+
+
+def routes(prefix='/api'):
+    """Starlette routes serving ``{prefix}/exports`` and ``{prefix}/exports/{name}``."""
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    async def listing(request):
+        return JSONResponse(await run_in_threadpool(catalog_listing))
+
+    async def table(request):
+        params = {}
+        for key, value in request.query_params.multi_items():
+            params.setdefault(key, []).append(value)
+        try:
+            # Rollups are CPU work; keep them off the server's event loop
+            status, body, headers = await run_in_threadpool(
+                respond, request.path_params['name'], params,
+                request.headers.get('if-none-match'), request.headers.get('accept', ''),
+            )
+        except ExportError as error:
+            return JSONResponse({'error': str(error)}, status_code=error.status)
+        return Response(body, status_code=status, headers=headers)
+
+    return [
+        Route(f'{prefix}/exports', listing),
+        Route(f'{prefix}/exports/{{name}}', table),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the export API without the page.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    import uvicorn
+    from starlette.applications import Starlette
+
+    uvicorn.run(Starlette(routes=routes()), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+
+FILTER_DIMENSIONS = ['FY', 'Region', 'Component', 'Land Filter', 'Drug Type']
+
+
+def result_bytes(result):
+    """Approximate memory held by a memoized result.
+
+    Frames and arrays are measured, containers summed, and other objects
+    asked for ``nbytes()`` (as ``DeltaTables`` provides) before falling
+    back to their shallow size.
+    """
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return int(np.sum(result.memory_usage(index=True, deep=True)))
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (tuple, list)):
+        return sum(result_bytes(item) for item in result)
+    if isinstance(result, dict):
+        return sum(result_bytes(item) for item in result.values())
+    nbytes = getattr(result, 'nbytes', None)
+    if callable(nbytes):
+        return nbytes()
+    return sys.getsizeof(result)
+
+
+class CubeIndex:
+    """Per-dimension sorted row-id lists over an aggregate cube.
+
+    A filter selection is answered by intersecting the row ids of the selected
+    values instead of scanning the cube with one boolean mask per chart, and
+    the filtered cubes and chart rollups are memoized per normalized selection,
+    so only inputs whose selection changed are recomputed. The memo is an
+    LRU bounded by the approximate bytes of its results (``result_bytes``).
+    """
+
+    def __init__(self, cube, dimensions=FILTER_DIMENSIONS + ['Area'], max_bytes=64 * 1024 * 1024):
+        self.cube = cube
+        self.options = {}
+        self.rows = {}
+        for dim in dimensions:
+            codes, uniques = pd.factorize(cube[dim], sort=True)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            values = uniques.tolist()
+            self.options[dim] = values
+            self.rows[dim] = {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)}
+        self._memo = OrderedDict()
+        self._bytes = 0
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def normalize(self, selection):
+        # Hashable, order-independent form of a selection; a dimension with
+        # nothing or everything selected doesn't restrict and is dropped, so
+        # equivalent selections share one key
+        key = []
+        for dim in self.rows:
+            values = set(selection.get(dim) or ()) & set(self.options[dim])
+            if values and len(values) < len(self.options[dim]):
+                key.append((dim, tuple(sorted(values))))
+        return tuple(key)
+
+    def select(self, key):
+        row_ids = None
+        for dim, values in key:
+            rows = [self.rows[dim][value] for value in values]
+            dim_rows = np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.intp)
+            row_ids = dim_rows if row_ids is None else np.intersect1d(row_ids, dim_rows, assume_unique=True)
+        return row_ids
+
+    def _memoized(self, memo_key, compute):
+        with self._lock:
+            if memo_key in self._memo:
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key][0]
+        result = compute()
+        # The unfiltered view is the cube itself, which the index holds anyway
+        size = 0 if result is self.cube else result_bytes(result)
+        with self._lock:
+            if memo_key in self._memo:
+                self._bytes -= self._memo.pop(memo_key)[1]
+            self._memo[memo_key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._memo) > 1:
+                self._bytes -= self._memo.popitem(last=False)[1][1]
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._memo), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+    def view(self, key):
+        """Return the cube rows matching a normalized selection key."""
+        def compute():
+            with stage('filter', dimensions=len(key)):
+                row_ids = self.select(key)
+                if row_ids is None:
+                    return self.cube
+                return self.cube.take(row_ids).reset_index(drop=True)
+        return self._memoized((None, key), compute)
+
+    def rollup(self, key, func):
+        """Return ``func(view(key))``, reusing the result while the selection is unchanged."""
+        def compute():
+            view = self.view(key)
+            with stage(f'aggregate.{func.__name__}'):
+                return func(view)
+        return self._memoized((func, key), compute)
+
@@ -0,0 +1,33 @@
+"""Offline geography for the map: Area locations and a simplified outline.
+
+Both come from files bundled under geo/, so the map needs no geocoding
+service or tile server. ``area_locations.csv`` places each Area of
+Responsibility at its field office or Border Patrol sector headquarters;
+PRECLEARANCE (CBP staff at airports abroad) has no location and isn't
+mapped. ``us_outline.geojson`` is a hand-simplified outline of the
+contiguous United States and Puerto Rico, with rings wound clockwise as
+d3 (and so Vega-Lite) expects.
+"""
+import json
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+
+GEO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geo')
+LOCATIONS_FILE = os.path.join(GEO_DIR, 'area_locations.csv')
+OUTLINE_FILE = os.path.join(GEO_DIR, 'us_outline.geojson')
+
+
+@lru_cache(maxsize=None)
+def area_locations():
+    """Area, Location, Latitude and Longitude of every mapped Area."""
+    return pd.read_csv(LOCATIONS_FILE)
+
+
+@lru_cache(maxsize=None)
+def outline():
+    """The outline's GeoJSON features."""
+    with open(OUTLINE_FILE) as geojson:
+        return json.load(geojson)['features']
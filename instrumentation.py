@@ -0,0 +1,193 @@
+"""Per-stage wall time, CPU time and peak allocation for a page run.
+
+Set ``DRUG_DATA_PROFILE=1`` to record stages; the page then shows a
+performance panel, and with ``DRUG_DATA_TRACE_DIR`` set every run is also
+written there as a Chrome trace (viewable in Perfetto, chrome://tracing or
+speedscope). With profiling off, ``stage()`` returns a shared no-op context
+manager, so instrumented code pays one function call per stage.
+
+tracemalloc counts the whole process and keeps a single peak, so peak
+allocation is only recorded for stages during which no other run was
+profiled; it still includes background threads' allocations. Tracing
+stops when the last run ends.
+
+    run = instrumentation.begin('page')
+    try:
+        with instrumentation.stage('load', path=path):
+            ...
+    finally:
+        instrumentation.end()
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+
+ENABLED = bool(os.environ.get('DRUG_DATA_PROFILE'))
+TRACE_DIR = os.environ.get('DRUG_DATA_TRACE_DIR')
+
+_NOOP = nullcontext()
+_local = threading.local()
+
+# Profiled runs in progress and ever begun, across threads
+_runs_lock = threading.Lock()
+_active_runs = 0
+_started_runs = 0
+_started_tracing = False
+
+
+class Trace:
+    """The stages recorded during one run, in the order they finished."""
+
+    def __init__(self, name):
+        self.name = name
+        self.events = []
+        self.start_ns = time.perf_counter_ns()
+        self.wall_clock = time.time()
+        self.depth = 0
+        self.peak = 0
+
+    def records(self):
+        return [
+            {
+                'stage': '  ' * event['depth'] + event['name'],
+                'wall_ms': round(event['wall_ns'] / 1e6, 3),
+                'cpu_ms': round(event['cpu_ns'] / 1e6, 3),
+                'peak_alloc_kb': None if event['peak_bytes'] is None else round(event['peak_bytes'] / 1024, 1),
+            }
+            # Nested stages finish before their parent; list them by start
+            for event in sorted(self.events, key=lambda event: (event['start_ns'], event['depth']))
+        ]
+
+    def chrome_trace(self):
+        """The run as Trace Event Format complete events, timestamps in microseconds."""
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': event['name'], 'cat': self.name, 'ph': 'X', 'pid': pid, 'tid': event['tid'],
+                    'ts': (event['start_ns'] - self.start_ns) / 1e3, 'dur': event['wall_ns'] / 1e3,
+                    'args': {**event['args'], 'cpu_ms': event['cpu_ns'] / 1e6,
+                             'peak_alloc_bytes': event['peak_bytes']},
+                }
+                for event in self.events
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {'run': self.name, 'started': self.wall_clock},
+        }
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.wall_clock))
+        path = os.path.join(directory, f'{self.name}-{stamp}-{os.getpid()}-{id(self):x}.json')
+        with open(path, 'w') as output:
+            json.dump(self.chrome_trace(), output)
+        return path
+
+
+class _Stage:
+    __slots__ = ('trace', 'name', 'args', 'depth', 'start_ns', 'cpu_start_ns', 'base_bytes', 'outer_peak',
+                 'runs')
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        trace = self.trace
+        self.runs = _exclusive_run()
+        if self.runs is not None:
+            # tracemalloc keeps one global peak; remember the enclosing stage's
+            # peak before resetting it so nested stages don't hide each other's
+            current, peak = tracemalloc.get_traced_memory()
+            self.outer_peak = max(trace.peak, peak)
+            tracemalloc.reset_peak()
+            trace.peak = current
+            self.base_bytes = current
+        self.depth = trace.depth
+        trace.depth += 1
+        self.cpu_start_ns = time.thread_time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall_ns = time.perf_counter_ns() - self.start_ns
+        cpu_ns = time.thread_time_ns() - self.cpu_start_ns
+        trace = self.trace
+        trace.depth -= 1
+        peak_bytes = None
+        # Another run started meanwhile may have reset the peak
+        if self.runs is not None and _exclusive_run() == self.runs:
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(trace.peak, peak)
+            trace.peak = max(self.outer_peak, peak)
+            peak_bytes = peak - self.base_bytes
+        trace.events.append({
+            'name': self.name, 'args': self.args, 'depth': self.depth, 'tid': threading.get_ident(),
+            'start_ns': self.start_ns, 'wall_ns': wall_ns, 'cpu_ns': cpu_ns, 'peak_bytes': peak_bytes,
+        })
+        return False
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def _exclusive_run():
+    """The number of runs begun so far if this is the only run in progress, else None."""
+    with _runs_lock:
+        return _started_runs if _active_runs == 1 else None
+
+
+def begin(name='run'):
+    """Start recording stages on this thread; return the Trace, or None when profiling is off."""
+    global _active_runs, _started_runs, _started_tracing
+    if not ENABLED:
+        return None
+    end()
+    with _runs_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _active_runs += 1
+        _started_runs += 1
+    trace = Trace(name)
+    _local.trace = trace
+    return trace
+
+
+def end():
+    """Stop recording on this thread and return the finished Trace, if any.
+
+    Call it from a ``finally`` so runs that stop early still end.
+    """
+    global _active_runs, _started_tracing
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is not None:
+        with _runs_lock:
+            _active_runs -= 1
+            if _active_runs == 0 and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+    if trace is not None and TRACE_DIR:
+        try:
+            trace.write(TRACE_DIR)
+        except OSError:
+            pass
+    return trace
+
+
+def stage(name, **args):
+    """Context manager timing one stage of the current run."""
+    if not ENABLED:
+        return _NOOP
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _NOOP
+    return _Stage(trace, name, args)
@@ -0,0 +1,127 @@
+import io
+import threading
+from collections import OrderedDict
+
+from charts import THEME
+from instrumentation import stage
+
+
+# Same output st.pyplot would produce for the figure
+SAVEFIG_OPTIONS = {'bbox_inches': 'tight', 'dpi': 200, 'format': 'png'}
+
+# Streamlit downsizes wider images on every call, so store them at this width
+MAX_IMAGE_WIDTH = 2 * 730
+
+
+def _fit_width(image, max_width=MAX_IMAGE_WIDTH):
+    from PIL import Image
+
+    picture = Image.open(io.BytesIO(image))
+    width, height = picture.size
+    if width <= max_width:
+        return image
+    picture = picture.resize((max_width, int(height * max_width / width)), resample=Image.BILINEAR)
+    buffer = io.BytesIO()
+    picture.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_figure(draw, *args, theme=THEME, max_width=MAX_IMAGE_WIDTH):
+    """Draw a chart and return it as PNG bytes, releasing the figure."""
+    import matplotlib.style
+
+    with matplotlib.style.context(theme):
+        fig = draw(*args)
+        buffer = io.BytesIO()
+        try:
+            fig.savefig(buffer, **SAVEFIG_OPTIONS)
+        finally:
+            # Break the figure's artist reference cycles now rather than
+            # waiting for the cyclic garbage collector
+            fig.clear()
+    image = buffer.getvalue()
+    return _fit_width(image, max_width) if max_width else image
+
+
+class RenderCache:
+    """LRU cache of rendered chart images, bounded by total bytes.
+
+    Keys are (chart id, filter key, data fingerprint, theme), so a rerun with
+    the same selection over the same data serves stored bytes instead of
+    re-rasterizing the figure.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Style contexts swap the global rcParams, so only one figure is drawn at a time
+        self._render_lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def render(self, key, theme, draw, *args):
+        image = self.get(key)
+        if image is not None:
+            return image
+        with self._render_lock:
+            # Another thread may have drawn it while this one waited
+            with self._lock:
+                image = self._entries.get(key)
+            if image is None:
+                with stage(f'render.{key[0]}'):
+                    image = render_figure(draw, *args, theme=theme)
+                self.put(key, image)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+render_cache = RenderCache()
+
+
+def render_key(chart_id, filter_key, data_key, theme=THEME):
+    return chart_id, filter_key, data_key, theme
+
+
+def render_png(chart_id, filter_key, data_key, draw, *args, theme=THEME):
+    """Return PNG bytes for ``draw(*args)``, rendering only on a cache miss."""
+    return render_cache.render(render_key(chart_id, filter_key, data_key, theme), theme, draw, *args)
@@ -0,0 +1,137 @@
+"""Render the dashboard's charts to static PNG/HTML reports without Streamlit.
+
+One report set is written per variant: the whole dataset, each Region and
+each Area of Responsibility. Charts are rendered in a process pool because
+matplotlib is not thread-safe.
+
+    python report.py --output-dir reports --workers 8
+"""
+import argparse
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from render_cache import render_figure
+from sections import SECTIONS
+from store import store
+
+
+VARIANT_DIMENSIONS = {'region': 'Region', 'area': 'Area'}
+
+
+def chart_jobs(cube):
+    """Yield (chart id, title, draw function, args) for every chart on the page."""
+    for section in SECTIONS:
+        yield from section.chart_jobs(section.rollup(cube))
+
+
+def variants(index, kinds):
+    yield 'all', 'All data', {}
+    for kind in kinds:
+        dim = VARIANT_DIMENSIONS[kind]
+        for value in index.options[dim]:
+            slug = re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+            yield f'{kind}-{slug}', f'{dim}: {value}', {dim: [value]}
+
+
+def render_job(job):
+    variant, chart_id, draw, args, path = job
+    start = time.perf_counter()
+    try:
+        image = render_figure(draw, *args, max_width=None)
+    except Exception as error:
+        # One unrenderable slice shouldn't cost the rest of the nightly run
+        return variant, chart_id, time.perf_counter() - start, f'{type(error).__name__}: {error}'
+    with open(path, 'wb') as output:
+        output.write(image)
+    return variant, chart_id, time.perf_counter() - start, None
+
+
+def write_html(path, title, sections):
+    body = '\n'.join(
+        f'<h2>{html.escape(heading)}</h2>\n<img src="{html.escape(src)}" alt="{html.escape(heading)}">'
+        for heading, src in sections
+    )
+    with open(path, 'w') as output:
+        output.write(
+            f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            '<style>body{background:#000;color:#eee;font-family:sans-serif}img{max-width:100%}'
+            'a{color:#7f7}</style></head>\n'
+            f'<body>\n<h1>{html.escape(title)}</h1>\n{body}\n</body></html>\n'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--variants', nargs='*', choices=sorted(VARIANT_DIMENSIONS),
+                        default=sorted(VARIANT_DIMENSIONS), help='variant kinds besides the full dataset')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshot = store.current()
+    index = snapshot.index
+    jobs = []
+    pages = []
+    for variant, title, selection in variants(index, args.variants):
+        cube = index.view(index.normalize(selection))
+        if cube.empty:
+            continue
+        directory = os.path.join(args.output_dir, variant)
+        os.makedirs(directory, exist_ok=True)
+        sections = []
+        for chart_id, heading, draw, chart_args in chart_jobs(cube):
+            jobs.append((variant, chart_id, draw, chart_args, os.path.join(directory, f'{chart_id}.png')))
+            sections.append((heading, f'{chart_id}.png'))
+        write_html(os.path.join(directory, 'index.html'), f'Nationwide Drug Seizures: {title}', sections)
+        pages.append((variant, title))
+    prepared = time.perf_counter() - start
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        timings = list(pool.map(render_job, jobs, chunksize=4))
+    elapsed = time.perf_counter() - start
+
+    with open(os.path.join(args.output_dir, 'index.html'), 'w') as output:
+        links = '\n'.join(
+            f'<li><a href="{variant}/index.html">{html.escape(title)}</a></li>' for variant, title in pages
+        )
+        output.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Reports</title></head>'
+                     f'<body><h1>Nationwide Drug Seizure Reports</h1>\n<ul>\n{links}\n</ul></body></html>\n')
+
+    render_total = sum(seconds for _, _, seconds, _ in timings)
+    failures = [(variant, chart_id, error) for variant, chart_id, _, error in timings if error]
+    summary = {
+        'data_fingerprint': snapshot.key,
+        'variants': len(pages),
+        'charts': len(timings),
+        'workers': args.workers,
+        'prepare_seconds': round(prepared, 3),
+        'wall_seconds': round(elapsed, 3),
+        'render_seconds_total': round(render_total, 3),
+        'charts_timing': [
+            {'variant': variant, 'chart': chart_id, 'seconds': round(seconds, 4), 'error': error}
+            for variant, chart_id, seconds, error in timings
+        ],
+    }
+    with open(os.path.join(args.output_dir, 'timings.json'), 'w') as output:
+        json.dump(summary, output, indent=2)
+
+    per_chart = {}
+    for _, chart_id, seconds, _ in timings:
+        per_chart.setdefault(re.sub(r'_\d{4}$', '', chart_id), []).append(seconds)
+    for chart_id, seconds in sorted(per_chart.items(), key=lambda item: -sum(item[1])):
+        print(f"{chart_id:28s} n={len(seconds):3d} mean={sum(seconds) / len(seconds):.3f}s max={max(seconds):.3f}s")
+    print(f"{len(timings)} charts for {len(pages)} variants in {elapsed:.1f}s wall "
+          f"({render_total:.1f}s of rendering, {render_total / max(elapsed - prepared, 1e-9):.1f}x parallel)")
+    for variant, chart_id, error in failures:
+        print(f"FAILED {variant}/{chart_id}: {error}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""The page's chart sections as lazily computed units.
+
+Each section names the cube rollup it needs and how to draw its charts from
+that rollup, so the page can defer a section until it is opened and the
+report can render every section the same way.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import aggregates as agg
+import chart_specs
+import charts
+from render_cache import render_cache, render_key, render_png
+
+
+class Section:
+    """A titled chart drawn from one rollup of the filtered cube.
+
+    ``spec`` optionally builds the same chart as a Vega-Lite spec for the
+    interactive backend, from the same arguments as ``draw``. Heavy
+    sections are the slow ones to aggregate or rasterize; the page
+    prefetches them in the background while they are still collapsed.
+    """
+
+    def __init__(self, section_id, title, rollup, draw, spec=None, heavy=False):
+        self.section_id = section_id
+        self.title = title
+        self.rollup = rollup
+        self.draw = draw
+        self.spec = spec
+        self.heavy = heavy
+
+    def chart_jobs(self, result):
+        """Return (chart id, title, draw function, args) for each chart of the section."""
+        return [(self.section_id, self.title, self.draw, (result,))]
+
+    def table(self, result):
+        """The rollup as one flat table with string column names, for the export API."""
+        if isinstance(result, pd.Series):
+            result = result.to_frame()
+        if any(name is not None for name in result.index.names):
+            result = result.reset_index()
+        result = result.rename_axis(columns=None)
+        result.columns = [str(column) for column in result.columns]
+        return result
+
+
+class YearlySection(Section):
+    """One chart per fiscal year from the (pivots, peaks) rollup."""
+
+    def chart_jobs(self, result):
+        pivots, _ = result
+        return [
+            (f'{self.section_id}_{year}', f'{self.title} in {year}', self.draw, (year, monthly_pivot, year_peaks))
+            for year, (monthly_pivot, year_peaks) in pivots.items()
+        ]
+
+    def table(self, result):
+        pivots, _ = result
+        columns = ['FY', 'Month (abbv)', 'Drug Type', 'Count of Event']
+        if not pivots:
+            return pd.DataFrame(columns=columns)
+        return pd.concat([
+            monthly_pivot.stack().dropna().astype('int64').rename('Count of Event').reset_index().assign(FY=year)
+            [columns]
+            for year, (monthly_pivot, _) in pivots.items()
+        ], ignore_index=True)
+
+
+class SpikeSection(Section):
+    """The most anomalous series from the (spikes, lines, marked) rollup; no chart without spikes."""
+
+    def chart_jobs(self, result):
+        _, lines, marked = result
+        if lines.empty:
+            return []
+        return [(self.section_id, self.title, self.draw, (lines, marked))]
+
+    def table(self, result):
+        spikes, _, _ = result
+        return spikes
+
+
+class SeriesSection(Section):
+    """Monthly series of the top drug types; no chart when every value is undefined.
+
+    That happens with no drug types left after exclusions, or for
+    statistics that compare fiscal years when only one is selected.
+    """
+
+    def chart_jobs(self, result):
+        if not result.notna().any().any():
+            return []
+        return super().chart_jobs(result)
+
+
+SECTIONS = [
+    Section('total_weight_by_drug', 'Total Weight by Drug Type',
+            agg.total_weight_by_drug, charts.total_weight_by_drug, chart_specs.total_weight_by_drug),
+    Section('region_trends_top5', 'Regional Trends for Top 5 Drugs',
+            agg.top_drugs_by_region, charts.region_trends_top5, chart_specs.region_trends_top5),
+    Section('monthly_trends_top3', 'Monthly Trends in Top 3 Drug Types by Weight',
+            agg.top_drugs_by_month, charts.monthly_trends_top3, chart_specs.monthly_trends_top3),
+    YearlySection('yearly_top3_events', 'Monthly Trends for Top 3 Drugs',
+                  agg.yearly_top_drug_pivots, charts.yearly_top3_events, chart_specs.yearly_top3_events,
+                  heavy=True),
+    SpikeSection('event_spikes', 'Unusual Months by Area and Drug Type',
+                 agg.event_spikes, charts.event_spikes, chart_specs.event_spikes),
+    Section('drug_share_over_time', 'Share of Each Drug Types over Time',
+            agg.drug_share_over_time, charts.drug_share_over_time, chart_specs.drug_share_over_time, heavy=True),
+    SeriesSection('drug_event_trends', 'Monthly Events of Top Drug Types',
+                  agg.drug_event_trends, charts.drug_event_trends, chart_specs.drug_event_trends),
+    SeriesSection('drug_event_yoy', 'Year-over-Year Change in Monthly Events',
+                  agg.drug_event_yoy, charts.drug_event_yoy, chart_specs.drug_event_yoy),
+    SeriesSection('drug_seasonality', 'Seasonal Pattern of Events by Fiscal Month',
+                  agg.drug_seasonality, charts.drug_seasonality, chart_specs.drug_seasonality),
+    Section('top_areas_events', 'Events by Drug Type for Top 10 Areas',
+            agg.top_areas_by_drug, charts.top_areas_events, chart_specs.top_areas_events, heavy=True),
+    Section('area_map', 'Events by Area of Responsibility',
+            agg.area_drug_locations, charts.area_map, chart_specs.area_map),
+    Section('region_land_filter', 'Regional Distribution of Events by Land Filter',
+            agg.region_land_filter_events, charts.region_land_filter, chart_specs.region_land_filter),
+    Section('region_component_heatmap', 'Regional Contribution of Events by Component',
+            agg.region_component_events, charts.region_component_heatmap, chart_specs.region_component_heatmap),
+    Section('monthly_events_polar', 'Monthly Event Distribution on Polar Axis',
+            agg.monthly_events, charts.monthly_events_polar, chart_specs.monthly_events_polar, heavy=True),
+]
+
+SECTIONS_BY_ID = {section.section_id: section for section in SECTIONS}
+
+
+# A single worker: charts are rasterized one at a time anyway, and the
+# page's own renders shouldn't queue behind several background ones
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _prefetch(section, index, filter_key, data_key, render):
+    try:
+        result = index.rollup(filter_key, section.rollup)
+        if not render:
+            return
+        for chart_id, _, draw, args in section.chart_jobs(result):
+            if render_key(chart_id, filter_key, data_key) not in render_cache:
+                render_png(chart_id, filter_key, data_key, draw, *args)
+    finally:
+        with _pending_lock:
+            _pending.discard((section.section_id, filter_key, data_key))
+
+
+def prefetch(index, filter_key, data_key, section_ids=None, interactive=False):
+    """Compute and render heavy sections in the background for a selection.
+
+    Rollups are always computed into the index's memo. With ``interactive``
+    sections with a Vega-Lite spec stop there, as the browser draws them;
+    only the others are rendered to PNG. Returns the futures of the
+    sections queued by this call; sections already queued for the same
+    selection are not queued again.
+    """
+    futures = []
+    for section in SECTIONS:
+        if not section.heavy or (section_ids is not None and section.section_id not in section_ids):
+            continue
+        job = (section.section_id, filter_key, data_key)
+        with _pending_lock:
+            if job in _pending:
+                continue
+            _pending.add(job)
+        render = not interactive or section.spec is None
+        futures.append(_prefetcher.submit(_prefetch, section, index, filter_key, data_key, render))
+    return futures
@@ -0,0 +1,186 @@
+"""Ad-hoc SQL over the seizure data, run by DuckDB when it is installed.
+
+Two tables are available: ``seizures`` holds the cleaned export rows (absent
+when streaming with DRUG_DATA_CHUNKSIZE) and ``cube`` the aggregate cube the
+charts are built from. Both are copied into DuckDB's columnar storage once
+per data version, so queries run vectorized on every core. Results are
+cached by normalized SQL text and data fingerprint.
+
+    from sql_engine import query
+    query('SELECT "Drug Type", sum("Weight (lbs)") FROM seizures GROUP BY ALL')
+"""
+import importlib.util
+import re
+import threading
+from collections import OrderedDict
+
+from instrumentation import stage
+from store import store
+
+
+EXAMPLE_QUERIES = {
+    'Weight per event by Area and Land Filter': '''SELECT Area, "Land Filter",
+       sum("Weight (lbs)") / sum("Count of Event") AS "lbs per event",
+       sum("Count of Event")::BIGINT AS events
+FROM seizures
+GROUP BY ALL
+ORDER BY "lbs per event" DESC''',
+    'FY-over-FY change in events by Component': '''SELECT Component, FY,
+       sum("Count of Event")::BIGINT AS events,
+       events - lag(events) OVER (PARTITION BY Component ORDER BY FY) AS change
+FROM cube
+GROUP BY Component, FY
+ORDER BY Component, FY''',
+}
+
+# Quoted strings and identifiers, dollar-quoted strings, then comments
+_LITERALS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|\$(\w*)\$.*?\$\2\$)|--[^\n]*|/\*.*?\*/""", re.S)
+
+
+class QueryError(Exception):
+    pass
+
+
+def available():
+    return importlib.util.find_spec('duckdb') is not None
+
+
+def _squash(text):
+    return re.sub(r'\s+', ' ', text)
+
+
+def normalize_sql(sql):
+    """Canonical text of a query: comments dropped, whitespace collapsed
+    outside quotes (including ``$$`` strings) and trailing semicolons removed.
+
+    Case is kept: DuckDB names result columns after unquoted aliases as
+    written, so ``AS Total`` and ``AS total`` give different results.
+    """
+    parts = []
+    text = []
+    position = 0
+    for match in _LITERALS.finditer(sql):
+        text.append(sql[position:match.start()])
+        if match.group(1):
+            parts.append(_squash(''.join(text)))
+            parts.append(match.group(1))
+            text = []
+        else:
+            text.append(' ')
+        position = match.end()
+    text.append(sql[position:])
+    parts.append(_squash(''.join(text)))
+    normalized = ''.join(parts).strip()
+    while normalized.endswith(';'):
+        normalized = normalized[:-1].rstrip()
+    return normalized
+
+
+def _check(connection, sql):
+    """Refuse anything but a single SELECT, as classified by DuckDB's own parser.
+
+    SELECT covers WITH, FROM-first, VALUES, TABLE, SUMMARIZE, DESCRIBE and
+    SHOW; EXPLAIN is refused since EXPLAIN ANALYZE runs its statement.
+    """
+    import duckdb
+
+    try:
+        statements = connection.extract_statements(sql)
+    except duckdb.Error as error:
+        raise QueryError(str(error)) from error
+    if not statements:
+        raise QueryError("empty query")
+    if len(statements) > 1:
+        raise QueryError("only one statement can be run at a time")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise QueryError("only read-only queries (SELECT, WITH, ...) are allowed")
+
+
+def connect(tables):
+    """Return a DuckDB connection holding copies of the given DataFrames.
+
+    File and network access are disabled once the tables are loaded, so
+    queries can only see these tables.
+    """
+    import duckdb
+
+    connection = duckdb.connect()
+    for name, frame in tables.items():
+        connection.register('_source', frame)
+        connection.execute(f'CREATE TABLE "{name}" AS SELECT * FROM _source')
+        connection.unregister('_source')
+    connection.execute("SET enable_external_access = false")
+    connection.execute("SET lock_configuration = true")
+    return connection
+
+
+class SqlEngine:
+    """DuckDB database over the shared store's data with an LRU of query results.
+
+    The database is rebuilt when the store publishes a new snapshot. Cached results
+    are shared between sessions, so callers must treat them as read-only.
+    """
+
+    def __init__(self, source=store, max_entries=128):
+        self.source = source
+        self.hits = 0
+        self.misses = 0
+        self._key = None
+        self._connection = None
+        self._results = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _database(self):
+        snapshot = self.source.current()
+        with self._lock:
+            if self._connection is None or self._key != snapshot.key:
+                tables = {'cube': snapshot.cube}
+                if snapshot.data is not None:
+                    tables['seizures'] = snapshot.data
+                with stage('sql.load', tables=len(tables)):
+                    self._connection = connect(tables)
+                self._key = snapshot.key
+                self._results.clear()
+            return self._key, self._connection
+
+    def tables(self):
+        _, connection = self._database()
+        return [name for (name,) in connection.cursor().execute('SHOW TABLES').fetchall()]
+
+    def query(self, sql):
+        """Run a read-only query and return the result as a DataFrame."""
+        import duckdb
+
+        normalized = normalize_sql(sql)
+        data_key, connection = self._database()
+        _check(connection.cursor(), sql)
+        cache_key = (data_key, normalized)
+        with self._lock:
+            if cache_key in self._results:
+                self.hits += 1
+                self._results.move_to_end(cache_key)
+                return self._results[cache_key]
+            self.misses += 1
+        try:
+            # A cursor per query: DuckDB connections aren't shared across threads
+            with stage('sql.query'):
+                result = connection.cursor().execute(sql.strip().rstrip(';')).df()
+        except duckdb.Error as error:
+            raise QueryError(str(error)) from error
+        with self._lock:
+            self._results[cache_key] = result
+            while len(self._results) > self._max_entries:
+                self._results.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._results)}
+
+
+engine = SqlEngine()
+
+
+def query(sql):
+    return engine.query(sql)
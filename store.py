@@ -0,0 +1,99 @@
+"""One read-only copy of the data per server process, shared by all sessions.
+
+Streamlit reruns the page script for every session and interaction. A
+``Snapshot`` bundles everything a run reads: the data fingerprint, the
+aggregate cube, the cleaned rows, the summary table and the ``CubeIndex``
+of each, with their memoized rollups. The store publishes a new snapshot when the exports change;
+until a run finishes it keeps using the snapshot it started with, so a
+refresh never mixes two versions of the data in one page.
+
+    from store import store
+    snapshot = store.current()
+    snapshot.index.rollup((), aggregates.total_weight_by_drug)
+"""
+import threading
+
+from aggregates import STREAM_CHUNKSIZE
+from catalog import catalog
+from filters import CubeIndex
+from instrumentation import stage
+from summaries import EXACT_ROWS, SUMMARY_DIMENSIONS
+
+
+class Snapshot:
+    """One consistent version of the data.
+
+    ``cube`` and ``data`` return shallow copies: they share the
+    snapshot's memory, and with pandas' copy-on-write (always on from
+    pandas 3, hence the requirement) a session that modifies its copy gets
+    private columns instead of changing everyone's.
+    Results memoized by ``index`` and ``summaries`` are shared objects
+    and must not be modified. ``summaries`` indexes the summary table, or
+    the rows themselves when there are fewer than ``EXACT_ROWS``; the
+    functions in summaries.py accept either.
+    """
+
+    def __init__(self, version, key, cube, summary, data, index, summaries):
+        self.version = version
+        self.key = key
+        self.index = index
+        self.summaries = summaries
+        self._summary = summary
+        self._cube = cube
+        self._data = data
+
+    @property
+    def cube(self):
+        return self._cube.copy(deep=False)
+
+    @property
+    def data(self):
+        """The cleaned rows, or None when streaming with DRUG_DATA_CHUNKSIZE."""
+        return None if self._data is None else self._data.copy(deep=False)
+
+    def nbytes(self):
+        """Memory held by the cube, summary and rows (not the memoized rollups)."""
+        frames = [self._cube, self._summary] + ([] if self._data is None else [self._data])
+        frames = list({id(frame): frame for frame in frames}.values())
+        return int(sum(frame.memory_usage(index=True, deep=True).sum() for frame in frames))
+
+
+class SharedStore:
+    """The current ``Snapshot`` of a catalog, rebuilt when its exports change."""
+
+    def __init__(self, source=catalog, with_data=STREAM_CHUNKSIZE is None):
+        self.source = source
+        self.with_data = with_data
+        self.published = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Return the snapshot of the exports as they are now."""
+        version, key, cube, summary, data = self.source.snapshot(self.with_data)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version >= version:
+            return snapshot
+        with self._lock:
+            # Another session may have published this version, or a newer
+            # one, while we waited
+            if self._snapshot is None or self._snapshot.version < version:
+                with stage('store.publish', version=version):
+                    if data is not None and len(data) < EXACT_ROWS:
+                        # Describing the rows is faster than the histograms
+                        # here, and they're in memory anyway
+                        summary = data
+                    self._snapshot = Snapshot(version, key, cube, summary, data, CubeIndex(cube),
+                                              CubeIndex(summary, SUMMARY_DIMENSIONS))
+                self.published += 1
+            return self._snapshot
+
+    def stats(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'published': self.published}
+        return {'published': self.published, 'version': snapshot.version, 'key': snapshot.key,
+                'bytes': snapshot.nbytes()}
+
+
+store = SharedStore()
@@ -0,0 +1,143 @@
+"""Mergeable summary statistics of the export rows.
+
+``data.describe()`` scans and sorts every row on every run, and can't run
+at all when the export is streamed. Instead each export is summarized once
+at ingest into a summary table. For every combination of the filter
+dimensions, every measure and every bucket of a logarithmic histogram, it
+holds the rows' count, sum, sum of squares, minimum and maximum. Buckets
+grow by a factor of ``GAMMA``, so quantiles read from the histogram are
+within ``ACCURACY`` relative error (the DDSketch construction), while
+counts, means, standard deviations, minima and maxima are exact. Like
+cubes, summaries of chunks, exports or filter cells merge by grouping and
+adding, so filtering or appending an export never rescans rows.
+
+    from summaries import build_summary, describe
+    describe(build_summary(data))
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import concat_frames
+from filters import FILTER_DIMENSIONS
+from instrumentation import stage
+
+
+SUMMARY_DIMENSIONS = FILTER_DIMENSIONS
+SUMMARY_MEASURES = ['Count of Event', 'Weight (lbs)', 'Weight per Event']
+
+ACCURACY = 0.01
+GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+# Smaller values, zero weights included, share the lowest bucket
+MIN_VALUE = 1e-9
+
+PERCENTILES = (0.25, 0.5, 0.75)
+
+# Below this many rows, statistics are computed from the rows themselves.
+# Small exports have only a few rows per cell, so their summary holds more
+# rows than the export and describing it is slower than describing the rows.
+EXACT_ROWS = 200_000
+
+_MOMENTS = {'Rows': 'sum', 'Sum': 'sum', 'SumSq': 'sum', 'Min': 'min', 'Max': 'max'}
+
+
+def _measures(data):
+    count = data['Count of Event'].to_numpy(dtype=np.float64)
+    weight = data['Weight (lbs)'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_event = np.where(count > 0, weight / count, np.nan)
+    return {'Count of Event': count, 'Weight (lbs)': weight, 'Weight per Event': per_event}
+
+
+def build_summary(data):
+    """The summary table of cleaned export rows."""
+    with stage('build_summary', rows=len(data)):
+        parts = []
+        for measure, values in _measures(data).items():
+            # Like describe(), missing values are left out
+            valid = np.isfinite(values)
+            values = values[valid]
+            moments = pd.DataFrame({
+                'Measure': pd.Categorical.from_codes(
+                    np.full(len(values), SUMMARY_MEASURES.index(measure)), categories=SUMMARY_MEASURES
+                ),
+                'Bin': np.ceil(np.log(np.maximum(values, MIN_VALUE)) / np.log(GAMMA)).astype(np.int32),
+                'Rows': np.ones(len(values), dtype=np.int64),
+                'Sum': values,
+                'SumSq': values * values,
+                'Min': values,
+                'Max': values,
+            })
+            parts.append(pd.concat([data.loc[valid, SUMMARY_DIMENSIONS].reset_index(drop=True), moments], axis=1))
+        summary = pd.concat(parts, ignore_index=True)
+        return summary.groupby(SUMMARY_DIMENSIONS + ['Measure', 'Bin'], observed=True).agg(_MOMENTS).reset_index()
+
+
+def merge_summaries(summaries):
+    with stage('merge_summaries', parts=len(summaries)):
+        summary = concat_frames(summaries).groupby(SUMMARY_DIMENSIONS + ['Measure', 'Bin'], observed=True)
+        return summary.agg(_MOMENTS).reset_index()
+
+
+def _statistics(summary, by, percentiles=PERCENTILES):
+    """count, mean, std, min, percentiles and max of each ``by`` group's rows."""
+    histogram = summary.groupby(by + ['Bin'], observed=True)[list(_MOMENTS)].agg(_MOMENTS)
+    moments = histogram.groupby(level=by, observed=True).agg(_MOMENTS)
+    rows = moments['Rows'].to_numpy()
+    mean = moments['Sum'].to_numpy() / rows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (moments['SumSq'].to_numpy() - moments['Sum'].to_numpy() * mean) / (rows - 1)
+    table = pd.DataFrame({
+        'count': rows,
+        'mean': mean,
+        'std': np.sqrt(np.maximum(variance, 0)),
+        'min': moments['Min'].to_numpy(),
+    }, index=moments.index)
+
+    # Bucket midpoints, clipped to the values actually seen in the bucket
+    bins = histogram.index.get_level_values('Bin').to_numpy()
+    estimates = np.clip(2 * GAMMA ** bins.astype(np.float64) / (GAMMA + 1),
+                        histogram['Min'].to_numpy(), histogram['Max'].to_numpy())
+    ends = np.cumsum(histogram['Rows'].to_numpy())
+    starts = np.concatenate([[0], np.cumsum(rows)[:-1]])
+    for q in percentiles:
+        # Linear interpolation between the closest ranks, as in describe()
+        rank = (rows - 1) * q
+        lower = estimates[np.searchsorted(ends, starts + np.floor(rank), side='right')]
+        upper = estimates[np.searchsorted(ends, starts + np.ceil(rank), side='right')]
+        table[f'{q * 100:g}%'] = lower + (upper - lower) * (rank - np.floor(rank))
+    table['max'] = moments['Max'].to_numpy()
+    return table
+
+
+def is_summary(frame):
+    """Whether ``frame`` is a summary table rather than cleaned export rows."""
+    return 'Bin' in frame.columns
+
+
+def describe(summary):
+    """Like ``data.describe()`` of the summarized rows: one column per measure.
+
+    ``summary`` may also be the cleaned rows themselves, for exports smaller
+    than ``EXACT_ROWS``.
+    """
+    if not is_summary(summary):
+        return pd.DataFrame(_measures(summary)).describe(percentiles=PERCENTILES)
+    table = _statistics(summary, ['Measure']).T
+    measures = [measure for measure in SUMMARY_MEASURES if measure in table.columns]
+    return table.reindex(columns=measures).rename_axis(columns=None)
+
+
+def distribution(summary, by='Drug Type', measure='Weight per Event'):
+    """Statistics of one measure for each ``by`` value, one row per value."""
+    if not is_summary(summary):
+        values = pd.DataFrame({by: summary[by].array, measure: _measures(summary)[measure]}).dropna()
+        table = values.groupby(by, observed=True)[measure].describe(percentiles=PERCENTILES)
+        table['count'] = table['count'].astype('int64')
+    else:
+        table = _statistics(summary[summary['Measure'] == measure], [by])
+    table.index = table.index.astype(str)
+    return table
+
+
+def weight_per_event_by_drug(summary):
+    return distribution(summary).sort_values('50%', ascending=False)
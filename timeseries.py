@@ -0,0 +1,155 @@
+"""Monthly time series of the cube on the fiscal calendar.
+
+The federal fiscal year starts in October, so FY 2021 runs from October 2020
+to September 2021. A ``MonthlySeries`` holds one measure as a dense
+months x series NumPy array over a contiguous monthly PeriodIndex spanning
+whole fiscal years. Rolling means, year-over-year deltas and the seasonal
+decomposition are computed on the whole array at once, for every series.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_loader import MONTH_ORDER
+
+
+FISCAL_YEAR_START = 10  # October
+
+# Month abbreviations in fiscal-year order, OCT first
+FISCAL_MONTH_ORDER = MONTH_ORDER[FISCAL_YEAR_START - 1:] + MONTH_ORDER[:FISCAL_YEAR_START - 1]
+
+
+def fiscal_ordinals(fy, month):
+    """Monthly period ordinals (months since Jan 1970) of FY/month-abbreviation pairs."""
+    month_number = pd.Categorical(month, categories=MONTH_ORDER).codes.astype(np.int64) + 1
+    if (month_number == 0).any():
+        raise ValueError("unknown month abbreviation")
+    year = np.asarray(fy, dtype=np.int64) - (month_number >= FISCAL_YEAR_START)
+    return (year - 1970) * 12 + month_number - 1
+
+
+def fiscal_periods(fy, month):
+    """Calendar months of FY/month-abbreviation pairs as a monthly PeriodIndex."""
+    return pd.PeriodIndex.from_ordinals(fiscal_ordinals(fy, month), freq='M')
+
+
+def _nanmean(values, axis):
+    # Series shorter than two years leave whole slices undefined; NaN is the answer there
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(values, axis=axis)
+
+
+def _trailing_sums(values, window):
+    # Sums of each run of ``window`` consecutive rows, from one cumulative sum
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    return cumulative[window:] - cumulative[:-window]
+
+
+class MonthlySeries:
+    """A measure per month and series (e.g. Drug Type) as a dense array.
+
+    ``values[t, k]`` is the total for month ``periods[t]`` and series
+    ``columns[k]``; months without events are zero. The first month is
+    always an October and the length a whole number of fiscal years.
+    """
+
+    def __init__(self, periods, columns, values):
+        self.periods = periods
+        self.columns = columns
+        self.values = values
+
+    def frame(self, values=None, timestamps=True):
+        """The series (or an array shaped like it) as a DataFrame indexed by month."""
+        index = self.periods.to_timestamp() if timestamps else self.periods
+        return pd.DataFrame(self.values if values is None else values,
+                            index=index.rename('Month'), columns=self.columns)
+
+    def select(self, columns):
+        positions = self.columns.get_indexer(columns)
+        return MonthlySeries(self.periods, self.columns[positions], self.values[:, positions])
+
+    def rolling_mean(self, window=3):
+        """Trailing ``window``-month means; the first ``window - 1`` months are NaN."""
+        means = np.full(self.values.shape, np.nan)
+        if len(self.values) >= window:
+            means[window - 1:] = _trailing_sums(self.values, window) / window
+        return means
+
+    def year_earlier(self):
+        """Each month's value in the same fiscal month of the previous FY; NaN without one.
+
+        Months are matched by period ordinal, twelve apart, rather than by
+        position, so the first fiscal year and any gap have no prior value.
+        """
+        ordinals = self.periods.asi8
+        positions = pd.Index(ordinals).get_indexer(ordinals - 12)
+        earlier = np.full(self.values.shape, np.nan)
+        found = positions >= 0
+        earlier[found] = self.values[positions[found]]
+        return earlier
+
+    def yoy(self):
+        """Change from the same fiscal month of the previous FY; NaN without one."""
+        return self.values - self.year_earlier()
+
+    def yoy_pct(self):
+        """Year-over-year change in percent; NaN where the earlier month had no events."""
+        earlier = self.year_earlier()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(earlier > 0, (self.values - earlier) / earlier * 100, np.nan)
+
+    def trend(self):
+        """Centered 2x12 moving average; six months at each end are NaN."""
+        trend = np.full(self.values.shape, np.nan)
+        if len(self.values) > 12:
+            twelve = _trailing_sums(self.values, 12) / 12
+            trend[6:-6] = (twelve[:-1] + twelve[1:]) / 2
+        return trend
+
+    def decompose(self):
+        """Classical additive decomposition into (trend, seasonal, residual) arrays.
+
+        The seasonal component is each fiscal month's mean deviation from
+        the trend, centered so a year of it sums to zero.
+        """
+        trend = self.trend()
+        detrended = (self.values - trend).reshape(len(self.values) // 12, 12, self.values.shape[1])
+        profile = _nanmean(detrended, axis=0)
+        profile = profile - _nanmean(profile, axis=0)
+        seasonal = np.tile(profile, (len(self.values) // 12, 1))
+        return trend, seasonal, self.values - trend - seasonal
+
+    def seasonal_profile(self):
+        """One fiscal year of the seasonal component, indexed OCT-SEP."""
+        _, seasonal, _ = self.decompose()
+        return pd.DataFrame(seasonal[:12], index=pd.Index(FISCAL_MONTH_ORDER, name='Month (abbv)'),
+                            columns=self.columns)
+
+
+def monthly_series(cube, by='Drug Type', measure='Count of Event'):
+    """Dense monthly series of ``measure`` per ``by`` value, in chronological order.
+
+    ``by`` may be a list of columns, giving one series per combination
+    present in the cube and MultiIndex columns.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    totals = cube.groupby(['FY', 'Month (abbv)', *keys], observed=True)[measure].sum().reset_index()
+    if isinstance(by, str):
+        codes, columns = pd.factorize(totals[by], sort=True)
+        columns = pd.Index(columns, name=by)
+    else:
+        codes, columns = pd.factorize(pd.MultiIndex.from_frame(totals[keys]), sort=True)
+        columns = columns.set_names(keys)
+    if totals.empty:
+        return MonthlySeries(pd.PeriodIndex([], freq='M'), columns, np.zeros((0, len(columns))))
+    ordinals = fiscal_ordinals(totals['FY'], totals['Month (abbv)'])
+    # Span whole fiscal years, October of the first to September of the last
+    first, last = totals['FY'].min(), totals['FY'].max()
+    start = fiscal_ordinals([first], ['OCT'])[0]
+    stop = fiscal_ordinals([last], ['SEP'])[0]
+    values = np.zeros((stop - start + 1, len(columns)))
+    np.add.at(values, (ordinals - start, codes), totals[measure].to_numpy(dtype=np.float64))
+    periods = pd.PeriodIndex.from_ordinals(np.arange(start, stop + 1), freq='M')
+    return MonthlySeries(periods, columns, values)
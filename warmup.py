@@ -0,0 +1,78 @@
+"""Warm the data caches and imports, then serve the app from the same process.
+
+Streamlit runs the page inside the server process, so everything loaded
+here (the ingested cube and its index, the cleaned rows, the plotting
+libraries and optionally the unfiltered page's static charts) is already
+in memory when the first visitor arrives.
+
+    python warmup.py                        # warm up, then serve like `streamlit run`
+    python warmup.py --render -- --server.port 8080
+    python warmup.py --check                # warm up and exit, e.g. as a deploy step
+"""
+import argparse
+import os
+import sys
+import time
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Drug_Data_Analysis_Streamlit.py')
+
+
+def warm(plotting=True, render=False):
+    """Load everything the first page view needs; return seconds per step."""
+    timings = {}
+    start = time.perf_counter()
+
+    import sections
+    from store import store
+    timings['import'] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    snapshot = store.current()
+    index = snapshot.index
+    data_key = snapshot.key
+    timings['data'] = time.perf_counter() - step
+
+    if plotting or render:
+        step = time.perf_counter()
+        import matplotlib.figure
+        import matplotlib.style
+        import PIL.Image
+        import seaborn
+        timings['plotting_import'] = time.perf_counter() - step
+
+    if render:
+        from render_cache import render_png
+
+        step = time.perf_counter()
+        for section in sections.SECTIONS:
+            for chart_id, _, draw, args in section.chart_jobs(index.rollup((), section.rollup)):
+                render_png(chart_id, (), data_key, draw, *args)
+        timings['render'] = time.perf_counter() - step
+
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--no-plotting', action='store_true', help="don't preload matplotlib and seaborn")
+    parser.add_argument('--render', action='store_true', help="prerender the unfiltered page's static charts")
+    parser.add_argument('--check', action='store_true', help='warm up and exit instead of serving')
+    parser.add_argument('streamlit_args', nargs=argparse.REMAINDER,
+                        help='options passed to `streamlit run` (after --)')
+    args = parser.parse_args()
+
+    timings = warm(plotting=not args.no_plotting, render=args.render)
+    print('warm-up: ' + ', '.join(f'{step} {seconds:.2f}s' for step, seconds in timings.items()), file=sys.stderr)
+    if args.check:
+        return
+
+    from streamlit.web import cli
+
+    extra = args.streamlit_args[1:] if args.streamlit_args[:1] == ['--'] else args.streamlit_args
+    cli.main(['run', SCRIPT, *extra], prog_name='streamlit')
+
+
+if __name__ == '__main__':
+    main()